@@ -0,0 +1,94 @@
+import contextlib
+import os
+import subprocess
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 基准测试脚本在 bench 目录下运行，把仓库根目录加入路径才能导入 tools 包
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def peak_rss():
+    """返回 (当前进程, 已回收的子进程) 的峰值常驻内存，单位字节；不支持的平台返回 (None, None)"""
+    if resource is None:
+        return None, None
+    # Linux 上 ru_maxrss 单位为KB，macOS 上为字节
+    unit = 1 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+
+
+def git_revision():
+    """返回 (提交哈希, 工作区是否有未提交修改)，不在git仓库中时返回 (None, None)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                check=True, capture_output=True, text=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def _cprofile_summary(profiler, limit):
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.relpath(filename, ROOT) if filename.startswith(ROOT) else filename}"
+                        f":{line}({name})",
+            "calls": calls,
+            "tottime": round(tottime, 4),
+            "cumtime": round(cumtime, 4),
+        })
+    rows.sort(key=lambda row: row["cumtime"], reverse=True)
+    return rows[:limit]
+
+
+@contextlib.contextmanager
+def profiling(profiler, output_base, limit=25):
+    """在 with 块内运行性能分析，结束后写出结果文件，并把概要填入返回的字典
+
+    profiler -- "cprofile"、"pyinstrument" 或 None（不分析）
+    output_base -- 结果文件路径（不含扩展名）：cProfile 写 .prof，pyinstrument 写 .txt 和 .html
+    只分析当前进程，进程池中的工作进程不在结果内。
+    """
+    report = {}
+    if not profiler:
+        yield report
+        return
+
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+
+        session = Profiler()
+        session.start()
+        try:
+            yield report
+        finally:
+            session.stop()
+            with open(output_base + ".txt", "w", encoding="utf-8") as f:
+                f.write(session.output_text())
+            with open(output_base + ".html", "w", encoding="utf-8") as f:
+                f.write(session.output_html())
+            report.update(profiler="pyinstrument", files=[output_base + ".txt", output_base + ".html"])
+        return
+
+    import cProfile
+
+    session = cProfile.Profile()
+    session.enable()
+    try:
+        yield report
+    finally:
+        session.disable()
+        session.dump_stats(output_base + ".prof")
+        report.update(profiler="cprofile", files=[output_base + ".prof"], top=_cprofile_summary(session, limit))
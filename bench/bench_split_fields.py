@@ -0,0 +1,53 @@
+"""对比 split_fields 与原先 cell.split(';') 的速度和结果差异
+
+用法: python bench/bench_split_fields.py [--rows 500000] [--file 已有的CSV]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+import _common  # noqa: F401  把仓库根目录加入 sys.path
+from fixtures import generate_split_csv
+from tools import csv_split
+
+
+def load_merged_cells(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return [''.join(row) for row in csv.reader(f) if ''.join(row)]
+
+
+def timed(func, values):
+    start = time.perf_counter()
+    result = func(values)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--file", help="使用已有的CSV文件，而不是生成测试数据")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if not path:
+            path = os.path.join(tmp, "bench.csv")
+            generate_split_csv(path, args.rows)
+        values = load_merged_cells(path)
+
+    naive, naive_time = timed(lambda v: [cell.split(';') for cell in v], values)
+    batched, batched_time = timed(lambda v: list(csv_split.iter_split_fields(v)), values)
+    fitted, fitted_time = timed(lambda v: list(csv_split.iter_split_fields(v, max_columns=4)), values)
+
+    differ = sum(1 for a, b in zip(naive, batched) if a != b)
+    print(f"行数: {len(values)}")
+    print(f"cell.split(';')            {naive_time:.3f}s  {len(values) / naive_time:,.0f} 行/s")
+    print(f"split_fields               {batched_time:.3f}s  {len(values) / batched_time:,.0f} 行/s")
+    print(f"split_fields(max_columns)  {fitted_time:.3f}s  {len(values) / fitted_time:,.0f} 行/s")
+    print(f"引号内分号导致结果不同的行: {differ}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""测量并行水印在不同进程数下的吞吐量
+
+用法: python bench/bench_watermark.py [--images 200] [--size 3000x2000] [--workers 1,2,4,8]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import _common  # noqa: F401  把仓库根目录加入 sys.path
+from fixtures import generate_images, generate_logo
+from tools import watermark
+
+
+def clear_outputs(folder, suffix):
+    for filename in os.listdir(folder):
+        if os.path.splitext(filename)[0].endswith(suffix):
+            os.remove(os.path.join(folder, filename))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--size", default="3000x2000")
+    parser.add_argument("--workers", default=None, help="逗号分隔的进程数列表，默认 1 到CPU核心数按倍数递增")
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    cpu_count = os.cpu_count() or 1
+    if args.workers:
+        worker_counts = [int(v) for v in args.workers.split(",")]
+    else:
+        worker_counts = sorted({min(2 ** i, cpu_count) for i in range(cpu_count.bit_length() + 1)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logo_path = os.path.join(tmp, "logo.png")
+        images = os.path.join(tmp, "images")
+        os.makedirs(images)
+        generate_logo(logo_path)
+        generate_images(images, args.images, size)
+
+        suffix = "_bench"
+        baseline = None
+        print(f"图片: {args.images} 张 {size[0]}x{size[1]}, CPU核心: {cpu_count}")
+        for workers in worker_counts:
+            clear_outputs(images, suffix)
+            start = time.perf_counter()
+            outputs, errors, cache_stats = watermark.add_watermark_parallel(
+                images, logo_path, output_suffix=suffix, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"进程数 {workers:>3}: {elapsed:7.2f}s  {len(outputs) / elapsed:7.1f} 张/s  "
+                  f"加速比 {baseline / elapsed:5.2f}x  失败 {len(errors)}  "
+                  f"{watermark.format_cache_stats(cache_stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""对比原先整幅RGBA合成与就地粘贴两种水印合成方式的耗时和峰值内存
+
+每种方式在独立的子进程中运行，用子进程的最大常驻内存(ru_maxrss)衡量峰值。
+用法: python bench/bench_watermark_compose.py [--size 6000x4000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from _common import peak_rss
+from fixtures import generate_images, generate_logo
+from tools import watermark
+
+
+def legacy_watermark(img, logo, position="bottom_right", margin=20):
+    """原先的合成流程：整幅转RGBA、新建透明画布、两次粘贴、再转回RGB"""
+    img = img.convert('RGBA')
+    watermarked = Image.new('RGBA', img.size, (0, 0, 0, 0))
+    logo_width = img.size[0] // 4
+    logo_height = int(logo_width * logo.size[1] / logo.size[0])
+    logo_resized = logo.resize((logo_width, logo_height), Image.Resampling.LANCZOS)
+    position_coords = watermark.calculate_position(img.size, logo_resized.size, position, margin)
+    watermarked.paste(img, (0, 0))
+    watermarked.paste(logo_resized, position_coords, logo_resized)
+    return watermarked.convert('RGB')
+
+
+def run_variant(variant, image_path, logo_path, repeat):
+    """在当前进程中运行一种合成方式，只计合成耗时，不含解码和保存"""
+    logo = watermark.load_logo(logo_path)
+    logo_cache = watermark.LogoCache(logo)
+    elapsed = 0.0
+    for _ in range(repeat):
+        with Image.open(image_path) as img:
+            img.load()
+            start = time.perf_counter()
+            if variant == "legacy":
+                legacy_watermark(img, logo)
+            elif variant == "inplace":
+                watermark.apply_watermark(img, logo_cache)
+            elapsed += time.perf_counter() - start
+
+    return {"variant": variant, "seconds": elapsed / repeat, "max_rss": peak_rss()[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="6000x4000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    parser.add_argument("--image", help=argparse.SUPPRESS)
+    parser.add_argument("--logo", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.image, args.logo, args.repeat)))
+        return
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    with tempfile.TemporaryDirectory() as tmp:
+        logo_path = os.path.join(tmp, "logo.png")
+        generate_logo(logo_path)
+        generate_images(tmp, 1, size)
+        image_path = os.path.join(tmp, "img_00000.jpg")
+
+        # 仅解码图片的基线内存，用于扣除解释器和原图本身的占用
+        results = {}
+        for variant in ("decode", "legacy", "inplace"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--variant", variant, "--image", image_path,
+                 "--logo", logo_path, "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[variant] = json.loads(output)
+
+    baseline = results["decode"]["max_rss"]
+    print(f"图片: {size[0]}x{size[1]}, 每种方式重复 {args.repeat} 次")
+    for variant in ("legacy", "inplace"):
+        result = results[variant]
+        extra_mb = (result["max_rss"] - baseline) / (1024 * 1024)
+        print(f"{variant:>8}: 合成 {result['seconds'] * 1000:8.1f} ms/张  解码之外的峰值内存 {extra_mb:8.1f} MB")
+    legacy, inplace = results["legacy"], results["inplace"]
+    print(f"加速比: {legacy['seconds'] / max(inplace['seconds'], 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""各基准测试共用的合成数据生成器，全部在本地生成，结果只取决于参数和随机种子"""
+import contextlib
+import functools
+import os
+import random
+import shutil
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# 生成逻辑变化时加一，已缓存的旧数据会被重新生成
+FIXTURES_VERSION = 1
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <meta name="robots" content="{robots}">
+    <link rel="canonical" href="{canonical}">
+</head>
+<body>
+    <h1>{title}</h1>
+    <nav>{links}</nav>
+    {body}
+</body>
+</html>"""
+
+WORDS = "商品 订单 客户 库存 发货 退款 报表 统计 供应商 仓库 渠道 区域 月度 年度 备注 说明".split()
+
+
+def page_path(index):
+    """第0页为站点首页，其余页面分散在多个栏目目录下"""
+    return "index.html" if index == 0 else f"section{index % 10}/page{index}.html"
+
+
+def site_depth(pages, fanout):
+    """按 fanout 叉树组织 pages 个页面时，从首页出发覆盖全部页面需要的抓取深度"""
+    depth, reach, level = 0, 1, 1
+    while reach < pages:
+        depth += 1
+        level *= fanout
+        reach += level
+    return depth
+
+
+def generate_site(folder, pages, fanout=8, extra_links=4, seed=0):
+    """生成一个静态站点
+
+    页面按 fanout 叉树互相链接保证都可达，另外每页随机链接 extra_links 个页面，
+    并混入失效链接、站外链接、mailto、锚点和图片等抓取时应跳过或记为失败的链接。
+    """
+    rng = random.Random(seed)
+    for index in range(pages):
+        targets = [i for i in range(index * fanout + 1, index * fanout + fanout + 1) if i < pages]
+        if index:
+            targets.append((index - 1) // fanout)
+        targets += [rng.randrange(pages) for _ in range(extra_links)]
+
+        links = [f'<a href="/{page_path(i)}">第 {i} 页</a>' for i in targets]
+        if rng.random() < 0.05:
+            links.append(f'<a href="/missing/page{index}.html">失效链接</a>')
+        links += [
+            '<a href="https://example.com/outside">站外</a>',
+            '<a href="mailto:info@example.com">邮件</a>',
+            '<a href="#top">顶部</a>',
+            f'<a href="/images/photo{index}.jpg">图片</a>',
+        ]
+
+        paragraphs = "".join(
+            "<p>" + " ".join(rng.choice(WORDS) for _ in range(40)) + "</p>" for _ in range(rng.randint(3, 12))
+        )
+        path = os.path.join(folder, page_path(index))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(PAGE_TEMPLATE.format(
+                title=f"测试页面 {index}",
+                robots="noindex" if rng.random() < 0.02 else "index, follow",
+                canonical=f"/{page_path(index)}",
+                links="\n".join(links),
+                body=paragraphs,
+            ))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_folder(folder):
+    """在后台线程中用本地HTTP服务器提供 folder，返回站点根地址"""
+    handler = functools.partial(_QuietHandler, directory=folder)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def generate_tree(folder, depth, breadth, files_per_dir, duplicate_ratio=0.1, max_file_size=64 * 1024, seed=0):
+    """生成 depth 层、每层 breadth 个子目录的文件树，返回 (文件数, 总字节数)
+
+    约 duplicate_ratio 比例的文件复制自之前生成的文件，用于检验重复文件识别；
+    另有隐藏文件和隐藏目录，应被统计工具跳过，不计入返回值。
+    """
+    rng = random.Random(seed)
+    extensions = [".jpg", ".png", ".mp4", ".pdf", ".docx", ".xlsx", ".csv", ".zip", ".java", ".txt", ".dat", ""]
+    originals = []
+    count = total = 0
+
+    def fill(path, level):
+        nonlocal count, total
+        os.makedirs(path, exist_ok=True)
+        for i in range(files_per_dir):
+            file_path = os.path.join(path, f"file{i}{rng.choice(extensions)}")
+            if originals and rng.random() < duplicate_ratio:
+                shutil.copyfile(rng.choice(originals), file_path)
+            else:
+                with open(file_path, "wb") as f:
+                    f.write(rng.randbytes(rng.randint(0, max_file_size)))
+                originals.append(file_path)
+            count += 1
+            total += os.path.getsize(file_path)
+
+        with open(os.path.join(path, ".hidden"), "wb") as f:
+            f.write(b"hidden")
+        if level < depth:
+            for i in range(breadth):
+                fill(os.path.join(path, f"dir{level}_{i}"), level + 1)
+
+    fill(folder, 0)
+    os.makedirs(os.path.join(folder, ".cache"), exist_ok=True)
+    with open(os.path.join(folder, ".cache", "skipped.dat"), "wb") as f:
+        f.write(b"x" * 1024)
+    return count, total
+
+
+def _messy_row(rng, index):
+    """一行不规范的数据：空值、混合日期格式、引号内的分隔符和换行、转义的引号"""
+    name = "".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+    quantity = "" if rng.random() < 0.05 else str(rng.randint(0, 5000))
+    price = "N/A" if rng.random() < 0.01 else f"{rng.uniform(0, 9999):.2f}"
+    year, month, day = rng.randint(2015, 2024), rng.randint(1, 12), rng.randint(1, 28)
+    date = f"{year}-{month:02d}-{day:02d}" if rng.random() < 0.7 else f"{year}/{month}/{day}"
+
+    roll = rng.random()
+    if roll < 0.05:
+        note = '"含;分号的备注"'
+    elif roll < 0.08:
+        note = '"多行\n备注"'
+    elif roll < 0.10:
+        note = '"带""引号""的备注"'
+    else:
+        note = rng.choice(WORDS)
+    status = rng.choice(("已完成", "处理中", "已取消", "待发货"))
+    return f"{index};{name};{quantity};{price};{date};{note};{status}\n"
+
+
+def generate_messy_csv(path, size_bytes, encoding="gbk", seed=0):
+    """生成约 size_bytes 大小、分号分隔、GBK编码的不规范CSV，返回数据行数"""
+    rng = random.Random(seed)
+    rows = 0
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write("编号;名称;数量;单价;日期;备注;状态\n")
+        while f.tell() < size_bytes:
+            f.write("".join(_messy_row(rng, rows + i) for i in range(10000)))
+            rows += 10000
+    return rows
+
+
+def generate_split_csv(path, rows, seed=0):
+    """生成带引号内分号的测试数据，约 5% 的行包含带引号的分号"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i in range(rows):
+            note = '"备注;含分号"' if rng.random() < 0.05 else f"备注{i}"
+            f.write(f"{i};商品{rng.randint(1, 9999)};{rng.randint(1, 500)};{note}\n")
+
+
+def generate_images(folder, count, size, seed=0):
+    """生成带随机色块的JPEG，避免纯色图片让编解码耗时失真"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    for i in range(count):
+        img = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(50):
+            x, y = rng.randrange(size[0]), rng.randrange(size[1])
+            color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            draw.rectangle((x, y, x + rng.randrange(400), y + rng.randrange(400)), fill=color)
+        img.save(os.path.join(folder, f"img_{i:05d}.jpg"), quality=90)
+
+
+def generate_logo(path):
+    from PIL import Image, ImageDraw
+
+    logo = Image.new("RGBA", (800, 300), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(logo)
+    draw.rounded_rectangle((0, 0, 799, 299), radius=60, fill=(255, 255, 255, 160))
+    draw.text((60, 120), "WATERMARK", fill=(0, 0, 0, 255))
+    logo.save(path)
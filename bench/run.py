@@ -0,0 +1,333 @@
+"""各工具核心功能的基准测试套件
+
+在本地生成合成数据（静态站点、带重复文件的深层目录、不规范的大CSV、图片集），
+每个用例在独立的子进程中无界面运行，记录耗时、吞吐量、峰值内存，可选 cProfile/pyinstrument，
+结果连同git提交保存为JSON，便于跨提交对比。生成的数据缓存在 bench/.fixtures，参数不变时复用。
+
+用法:
+    python bench/run.py                                  # 全部用例，small 规模
+    python bench/run.py --scale large csv-import         # 指定用例；large 规模的CSV约 2GB
+    python bench/run.py --profile cprofile               # 同时保存性能分析结果
+    python bench/run.py --compare bench/results/旧结果.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+import fixtures
+from _common import ROOT, git_revision, peak_rss, profiling
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MB = 1024 * 1024
+
+SCALES = {
+    "small": {
+        "site_pages": 200, "tree": (4, 3, 8, 16 * 1024), "csv_bytes": 20 * MB,
+        "split_rows": 200_000, "images": 20, "image_size": (2000, 1500),
+    },
+    "medium": {
+        "site_pages": 1000, "tree": (5, 4, 10, 64 * 1024), "csv_bytes": 256 * MB,
+        "split_rows": 1_000_000, "images": 100, "image_size": (3000, 2000),
+    },
+    "large": {
+        "site_pages": 5000, "tree": (6, 4, 12, 64 * 1024), "csv_bytes": 2048 * MB,
+        "split_rows": 5_000_000, "images": 300, "image_size": (6000, 4000),
+    },
+}
+
+
+def prepare_site(folder, params):
+    fixtures.generate_site(folder, params["site_pages"])
+    return {"pages": params["site_pages"], "depth": fixtures.site_depth(params["site_pages"], 8)}
+
+
+def run_sitemap(tool, folder, meta, workdir, jobs):
+    generator = tool.SitemapGenerator(max_depth=meta["depth"], max_concurrency=jobs or 5)
+    with fixtures.serve_folder(folder) as base_url:
+        stats = asyncio.run(generator.run(base_url, os.path.join(workdir, "sitemap.html")))
+    return {"items": stats["pages"], "extra": {key: stats[key] for key in ("failed", "links", "broken_links")}}
+
+
+def prepare_tree(folder, params):
+    depth, breadth, files_per_dir, max_file_size = params["tree"]
+    count, total = fixtures.generate_tree(folder, depth, breadth, files_per_dir, max_file_size=max_file_size)
+    return {"files": count, "bytes": total}
+
+
+def run_inventory(tool, folder, meta, workdir, jobs):
+    file_list, max_depth = tool.get_file_info(folder)
+    tool.sort_file_list(file_list, max_depth)
+    duplicates = sum(1 for info in file_list if info["是否重复"])
+    return {"items": len(file_list), "bytes": meta["bytes"], "extra": {"duplicates": duplicates}}
+
+
+def prepare_csv(folder, params):
+    path = os.path.join(folder, "messy.csv")
+    rows = fixtures.generate_messy_csv(path, params["csv_bytes"])
+    return {"path": "messy.csv", "rows": rows, "bytes": os.path.getsize(path)}
+
+
+def run_csv_import(tool, folder, meta, workdir, jobs):
+    # convert_file 把所有异常（包括缺少依赖）都记录在结果里，先导入一次，缺少时按跳过处理
+    for module in ("pandas", "numpy", "chardet"):
+        importlib.import_module(module)
+    result = tool.convert_file(os.path.join(folder, meta["path"]), output_format="csv", output_dir=workdir,
+                               force=True, optimize_dtypes=True)
+    if result["status"] != "ok":
+        raise RuntimeError(result["error"])
+    return {"items": result["rows"], "bytes": result["bytes"]}
+
+
+def prepare_split_csv(folder, params):
+    path = os.path.join(folder, "split.csv")
+    fixtures.generate_split_csv(path, params["split_rows"])
+    return {"path": "split.csv", "rows": params["split_rows"], "bytes": os.path.getsize(path)}
+
+
+def run_csv_split(tool, folder, meta, workdir, jobs):
+    _, _, rows = tool.merge_and_split(os.path.join(folder, meta["path"]),
+                                      os.path.join(workdir, "merged.xlsx"), os.path.join(workdir, "split.xlsx"))
+    return {"items": rows, "bytes": meta["bytes"]}
+
+
+def prepare_images(folder, params):
+    images = os.path.join(folder, "images")
+    os.makedirs(images)
+    fixtures.generate_images(images, params["images"], params["image_size"])
+    fixtures.generate_logo(os.path.join(folder, "logo.png"))
+    total = sum(os.path.getsize(os.path.join(images, name)) for name in os.listdir(images))
+    return {"images": params["images"], "bytes": total}
+
+
+def run_watermark(tool, folder, meta, workdir, jobs):
+    result = tool.run_batch(os.path.join(folder, "images"), os.path.join(workdir, "out"),
+                            os.path.join(folder, "logo.png"), workers=jobs, force=True)
+    if result["errors"]:
+        raise RuntimeError(next(iter(result["errors"].values())))
+    return {"items": len(result["processed"]), "bytes": meta["bytes"], "extra": {"cache": result["cache"]}}
+
+
+# 用例名: (影响数据的参数, 生成数据, 模块, 运行, 吞吐量单位)
+CASES = {
+    "sitemap": (("site_pages",), prepare_site, "tools.sitemap", run_sitemap, "页"),
+    "inventory": (("tree",), prepare_tree, "tools.inventory", run_inventory, "文件"),
+    "csv-import": (("csv_bytes",), prepare_csv, "tools.csv_import", run_csv_import, "行"),
+    "csv-split": (("split_rows",), prepare_split_csv, "tools.csv_split", run_csv_split, "行"),
+    "watermark": (("images", "image_size"), prepare_images, "tools.watermark", run_watermark, "张"),
+}
+
+
+def ensure_fixture(name, fixtures_root, params):
+    """参数与上次生成时相同就复用已有数据，否则重新生成；返回 (数据目录, 生成耗时)"""
+    keys, prepare = CASES[name][:2]
+    # 经过一次JSON往返，元组变成列表，才能与缓存中读出的参数比较
+    wanted = {key: params[key] for key in keys}
+    wanted = json.loads(json.dumps(dict(wanted, version=fixtures.FIXTURES_VERSION)))
+    folder = os.path.join(fixtures_root, name)
+    marker = os.path.join(folder, ".fixture.json")
+
+    try:
+        with open(marker, encoding="utf-8") as f:
+            if json.load(f)["params"] == wanted:
+                return folder, 0.0
+    except (OSError, ValueError, KeyError):
+        pass
+
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    start = time.perf_counter()
+    meta = prepare(folder, params)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({"params": wanted, "meta": meta}, f, ensure_ascii=False)
+    return folder, time.perf_counter() - start
+
+
+def run_worker(args):
+    """子进程中执行单个用例，结果写入 args.result_file"""
+    _, _, module_name, run, unit = CASES[args.worker]
+    with open(os.path.join(args.fixture_dir, ".fixture.json"), encoding="utf-8") as f:
+        meta = json.load(f)["meta"]
+
+    result = {"status": "ok", "unit": unit}
+    with tempfile.TemporaryDirectory() as workdir:
+        # 部分脚本会在当前目录写日志和输出文件
+        os.chdir(workdir)
+        try:
+            start = time.perf_counter()
+            tool = importlib.import_module(module_name)
+            result["import_s"] = time.perf_counter() - start
+            import_rss = peak_rss()[0]
+            result["import_rss_mb"] = import_rss / MB if import_rss else None
+
+            start = time.perf_counter()
+            with profiling(args.profile, args.profile_base) as profile:
+                measured = run(tool, args.fixture_dir, meta, workdir, args.jobs)
+            elapsed = time.perf_counter() - start
+        except ImportError as e:
+            # 各工具的依赖在用到时才导入，缺少时跳过该用例
+            result.update(status="skipped", error=f"缺少依赖: {e}")
+            return result
+        except Exception as e:
+            result.update(status="error", error=f"{type(e).__name__}: {e}", traceback=traceback.format_exc())
+            return result
+        finally:
+            os.chdir(ROOT)
+
+    self_rss, children_rss = peak_rss()
+    result.update(
+        wall_s=elapsed,
+        items=measured["items"],
+        throughput=measured["items"] / max(elapsed, 1e-9),
+        bytes=measured.get("bytes"),
+        mb_per_s=measured["bytes"] / MB / max(elapsed, 1e-9) if measured.get("bytes") else None,
+        peak_rss_mb=self_rss / MB if self_rss else None,
+        children_peak_rss_mb=children_rss / MB if children_rss else None,
+        extra=measured.get("extra", {}),
+    )
+    if profile:
+        result["profile"] = profile
+    return result
+
+
+def run_case(name, fixture_dir, args, profile_base):
+    with tempfile.TemporaryDirectory() as tmp:
+        result_file = os.path.join(tmp, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", name, "--fixture-dir", fixture_dir,
+                   "--result-file", result_file]
+        if args.jobs:
+            command += ["--jobs", str(args.jobs)]
+        if args.profile:
+            command += ["--profile", args.profile, "--profile-base", profile_base]
+        try:
+            process = subprocess.run(command, cwd=BENCH_DIR, capture_output=True, text=True, timeout=args.timeout)
+        except subprocess.TimeoutExpired:
+            return {"status": "error", "error": f"超过 {args.timeout}s 未完成"}
+        if not os.path.exists(result_file):
+            return {"status": "error", "error": process.stderr.strip().splitlines()[-1:] or "子进程异常退出",
+                    "stderr": process.stderr[-4000:]}
+        with open(result_file, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def format_case(name, result):
+    if result["status"] != "ok":
+        return f"{name:<11} {result['status']}: {result['error']}"
+    line = (f"{name:<11} {result['wall_s']:8.2f}s  {result['throughput']:12,.1f} {result['unit']}/s  "
+            f"峰值内存 {result['peak_rss_mb'] or 0:7.1f} MB")
+    if result.get("children_peak_rss_mb"):
+        line += f" (子进程 {result['children_peak_rss_mb']:.1f} MB)"
+    if result.get("mb_per_s"):
+        line += f"  {result['mb_per_s']:.1f} MB/s"
+    return line
+
+
+def format_comparison(previous, current):
+    """逐个用例对比耗时、吞吐量和峰值内存，比值大于1表示当前更快/更省内存"""
+    lines = [f"对比 {(previous.get('commit') or '?')[:8]} -> {(current.get('commit') or '?')[:8]}"]
+    for name, result in current["cases"].items():
+        old = previous.get("cases", {}).get(name)
+        if not old or old.get("status") != "ok" or result["status"] != "ok":
+            lines.append(f"{name:<11} 无可比数据")
+            continue
+        speedup = old["wall_s"] / max(result["wall_s"], 1e-9)
+        line = f"{name:<11} 耗时 {old['wall_s']:.2f}s -> {result['wall_s']:.2f}s ({speedup:.2f}x)"
+        if old.get("peak_rss_mb") and result.get("peak_rss_mb"):
+            line += f"  内存 {old['peak_rss_mb']:.0f} -> {result['peak_rss_mb']:.0f} MB"
+        if old.get("items") != result.get("items"):
+            line += f"  注意：处理数量不同 {old.get('items')} -> {result.get('items')}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", metavar="CASE", help=f"要运行的用例，默认全部：{', '.join(CASES)}")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="测试数据规模")
+    parser.add_argument("-j", "--jobs", type=int, help="并行进程数（水印）或并发数（站点地图），默认由工具决定")
+    parser.add_argument("--profile", choices=("cprofile", "pyinstrument"),
+                        help="对主进程做性能分析；分析开销会计入耗时")
+    parser.add_argument("--fixtures", default=os.path.join(BENCH_DIR, ".fixtures"), help="测试数据缓存目录")
+    parser.add_argument("-o", "--output", default=os.path.join(BENCH_DIR, "results"), help="结果保存目录")
+    parser.add_argument("--compare", help="与之前保存的结果JSON对比")
+    parser.add_argument("--timeout", type=float, help="单个用例的超时时间（秒）")
+    parser.add_argument("--worker", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--fixture-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    parser.add_argument("--profile-base", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"未知用例: {', '.join(unknown)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        result = run_worker(args)
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        return
+
+    commit, dirty = git_revision()
+    started = datetime.now()
+    run_name = f"{started:%Y%m%d-%H%M%S}-{(commit or 'nogit')[:8]}"
+    os.makedirs(args.output, exist_ok=True)
+    profile_dir = os.path.join(args.output, run_name)
+    if args.profile:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    params = SCALES[args.scale]
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": started.isoformat(timespec="seconds"),
+        "scale": args.scale,
+        "params": params,
+        "jobs": args.jobs,
+        "profiler": args.profile,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": {},
+    }
+
+    print(f"提交 {(commit or '?')[:8]}{' (有未提交修改)' if dirty else ''}，规模 {args.scale}，"
+          f"CPU核心 {os.cpu_count()}")
+    for name in args.cases or CASES:
+        try:
+            fixture_dir, generated = ensure_fixture(name, os.path.abspath(args.fixtures), params)
+        except ImportError as e:
+            # 测试数据在主进程生成，生成器缺少依赖（如 Pillow）时同样跳过该用例
+            result = {"status": "skipped", "unit": CASES[name][4], "error": f"缺少依赖: {e}"}
+            report["cases"][name] = result
+            print(format_case(name, result))
+            continue
+        if generated:
+            print(f"{name:<11} 已生成测试数据 ({generated:.1f}s)")
+        result = run_case(name, fixture_dir, args, os.path.join(profile_dir, name))
+        report["cases"][name] = result
+        print(format_case(name, result))
+
+    output_path = os.path.join(args.output, run_name + ".json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"结果已保存: {output_path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(format_comparison(json.load(f), report))
+
+
+if __name__ == "__main__":
+    main()
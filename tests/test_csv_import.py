@@ -0,0 +1,75 @@
+"""按样本推断的紧凑类型应用到全部分块时不能改变数据"""
+import csv
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("chardet")
+
+from tools.csv_import import DTYPE_SAMPLE_ROWS, apply_dtypes, convert_file, infer_dtypes
+
+
+def test_integer_dtype_keeps_fractional_values():
+    dtypes = infer_dtypes(pd.DataFrame({"v": [1] * 10}))
+    assert dtypes["v"] == "int8"
+
+    chunk = apply_dtypes(pd.DataFrame({"v": [1.0, 2.5, 3.7]}), dtypes)
+    assert chunk["v"].tolist() == [1.0, 2.5, 3.7]
+
+
+def test_float32_only_when_lossless():
+    dtypes = infer_dtypes(pd.DataFrame({"v": [0.5, 1.25, None]}))
+    assert dtypes["v"] == "float32"
+
+    lossless = apply_dtypes(pd.DataFrame({"v": [0.75, None]}), dtypes)
+    assert str(lossless["v"].dtype) == "float32"
+
+    chunk = apply_dtypes(pd.DataFrame({"v": [0.1, 0.2]}), dtypes)
+    assert str(chunk["v"].dtype) == "float64"
+    assert chunk["v"].tolist() == [0.1, 0.2]
+
+
+def test_convert_file_keeps_values_after_sample(tmp_path):
+    source = tmp_path / "data.csv"
+    values = ["1"] * DTYPE_SAMPLE_ROWS + ["2.5", "3.7", "0.1"]
+    source.write_text("v\n" + "\n".join(values) + "\n", encoding="utf-8")
+
+    result = convert_file(str(source), output_format="csv", delimiter=",", optimize_dtypes=True)
+    assert result["status"] == "ok", result["error"]
+
+    with open(result["output"], encoding="utf-8-sig", newline="") as f:
+        written = [row["v"] for row in csv.DictReader(f)]
+    assert written[-3:] == ["2.5", "3.7", "0.1"]
+
+
+def test_failed_conversion_is_not_skipped_later(tmp_path, monkeypatch):
+    from tools import csv_import
+
+    source = tmp_path / "data.csv"
+    source.write_text("v\n1\n", encoding="utf-8")
+    first = convert_file(str(source), output_format="csv", delimiter=",")
+    assert first["status"] == "ok", first["error"]
+
+    source.write_text("v\n" + "\n".join(str(i) for i in range(100)) + "\n", encoding="utf-8")
+    read_csv = csv_import.read_csv
+
+    def failing_read_csv(*args, **kwargs):
+        chunks = read_csv(*args, **kwargs)
+        if "chunksize" not in kwargs:
+            return chunks
+
+        def generate():
+            yield next(iter(chunks))
+            raise ValueError("模拟解析错误")
+        return generate()
+
+    monkeypatch.setattr(csv_import, "CHUNK_SIZE", 10)
+    monkeypatch.setattr(csv_import, "read_csv", failing_read_csv)
+    failed = convert_file(str(source), output_format="csv", delimiter=",")
+    assert failed["status"] == "error"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.csv", "data_split out.csv"]
+
+    monkeypatch.setattr(csv_import, "read_csv", read_csv)
+    rerun = convert_file(str(source), output_format="csv", delimiter=",")
+    assert rerun["status"] == "ok", rerun["error"]
+    assert rerun["rows"] == 100
@@ -0,0 +1,43 @@
+"""split_fields 的分列规则：引号内的分隔符、列数对齐、含换行的值"""
+from tools.csv_split import iter_split_fields, split_fields
+
+
+def test_quoted_separator_is_not_split():
+    assert split_fields(['a;"b;c";d', 'e']) == [['a', 'b;c', 'd'], ['e']]
+
+
+def test_empty_value_gives_one_empty_column():
+    assert split_fields(['', 'a;b']) == [[''], ['a', 'b']]
+
+
+def test_max_columns_folds_and_pads():
+    rows = split_fields(['a;b;c;d', 'a'], max_columns=3)
+    assert rows == [['a', 'b', 'c;d'], ['a', '', '']]
+
+
+def test_multi_character_separator():
+    assert split_fields(['a||b||c'], separator='||', max_columns=2) == [['a', 'b||c']]
+
+
+def test_fallback_keeps_original_line_terminators():
+    values = ['a\rb;c', 'x\r\ny;z', 'p\nq', 'm\n\nn;o', 'plain;row']
+    assert split_fields(values) == [
+        ['a\rb', 'c'],
+        ['x\r\ny', 'z'],
+        ['p\nq'],
+        ['m\n\nn', 'o'],
+        ['plain', 'row'],
+    ]
+
+
+def test_fallback_keeps_quoted_newlines_and_unbalanced_quotes():
+    assert split_fields(['"a\nb";c', 'd;"e']) == [['a\nb', 'c'], ['d', 'e']]
+
+
+def test_without_quotechar_quotes_are_kept():
+    assert split_fields(['"a;b"'], quotechar=None) == [['"a', 'b"']]
+
+
+def test_iter_split_fields_matches_split_fields():
+    values = [f'{i};"x;{i}"' for i in range(25)] + ['a\rb;c']
+    assert list(iter_split_fields(values, batch_size=7)) == split_fields(values)
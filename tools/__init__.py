@@ -0,0 +1,5 @@
+"""日常数据处理小工具
+
+各子模块导入时只加载标准库，pandas、openpyxl、Pillow、playwright、tkinter 等依赖
+在真正用到时才导入，可以直接作为库调用，也可以通过 python -m tools <命令> 运行。
+"""
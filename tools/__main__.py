@@ -0,0 +1,41 @@
+"""统一入口: python -m tools <命令> [参数]，各命令的参数见 python -m tools <命令> --help"""
+import importlib
+import sys
+
+# 命令: (模块, 说明)
+COMMANDS = {
+    "sitemap": ("tools.sitemap", "抓取网站并生成HTML站点地图"),
+    "inventory": ("tools.inventory", "统计文件夹内的文件并导出Excel目录"),
+    "csv-import": ("tools.csv_import", "批量转换不规范的CSV文件"),
+    "csv-split": ("tools.csv_split", "CSV每行合并为一个单元格并按分隔符分列"),
+    "watermark": ("tools.watermark", "给图片批量添加水印"),
+}
+
+
+def print_usage(file=sys.stdout):
+    print("用法: python -m tools <命令> [参数]\n\n命令:", file=file)
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<12}{description}", file=file)
+    print("\n不带参数运行某个命令时打开其图形界面（如有）。", file=file)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage(sys.stdout if argv else sys.stderr)
+        return 0 if argv else 2
+
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"未知命令: {command}\n", file=sys.stderr)
+        print_usage(sys.stderr)
+        return 2
+
+    # 让各命令的 argparse 帮助信息显示完整的调用方式
+    sys.argv[0] = f"python -m tools {command}"
+    module = importlib.import_module(COMMANDS[command][0])
+    return module.main(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,551 @@
+"""批量转换不规范的CSV文件：自动检测编码和格式，可选推断紧凑的列类型
+
+pandas、numpy 和 chardet 在实际解析时才导入；图形界面在 tools.csv_import_gui 中。
+"""
+import os
+import sys
+import csv
+import glob
+import json
+import hashlib
+import mmap
+import time
+import functools
+import argparse
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 50000
+OUTPUT_SUFFIX = "_split out"
+OUTPUT_FORMATS = {
+    "xlsx": ".xlsx",
+    "parquet": ".parquet",
+    "csv": ".csv",
+}
+
+# 类型推断使用的样本行数，以及判定为分类列的唯一值占比上限
+DTYPE_SAMPLE_ROWS = 1000
+CATEGORY_MAX_RATIO = 0.5
+INT_DTYPES = ("int8", "int16", "int32", "int64")
+DTYPE_CHOICES = [
+    "object", "string", "category", "bool", "boolean",
+    "int8", "int16", "int32", "int64", "Int8", "Int16", "Int32", "Int64",
+    "float32", "float64", "datetime64[ns]",
+]
+# 预览只读取文件开头的这部分字节，编码检测按块进行
+PREVIEW_BYTES = 256 * 1024
+ENCODING_BLOCK_SIZE = 64 * 1024
+SNIFF_CHARS = 4096
+
+DATE_PATTERN = re.compile(r'^\d{4}[-/.]\d{1,2}[-/.]\d{1,2}([ T]\d{1,2}:\d{2}(:\d{2})?)?$')
+
+
+def _detect_blocks(blocks):
+    """逐块交给chardet，置信度足够时提前结束"""
+    from chardet.universaldetector import UniversalDetector
+
+    detector = UniversalDetector()
+    for block in blocks:
+        detector.feed(block)
+        if detector.done:
+            break
+    detector.close()
+    return detector.result['encoding']
+
+
+def detect_encoding(file_path):
+    """检测整个文件的编码，分块读取，不会把文件一次性读入内存"""
+    with open(file_path, 'rb') as f:
+        return _detect_blocks(iter(lambda: f.read(ENCODING_BLOCK_SIZE), b''))
+
+
+def sniff_dialect(sample):
+    dialect = csv.Sniffer().sniff(sample[:SNIFF_CHARS])
+    return dialect.delimiter, dialect.quotechar
+
+
+def detect_dialect(file_path, encoding):
+    """根据文件开头的样本推断分隔符和引号字符"""
+    with open(file_path, 'r', encoding=encoding) as f:
+        sample = f.read(SNIFF_CHARS)
+
+    return sniff_dialect(sample)
+
+
+def read_head(file_path, size=PREVIEW_BYTES):
+    """通过内存映射只读取文件开头 size 字节，并截断到最后一个完整的行"""
+    with open(file_path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                head = mm[:size]
+        except (ValueError, OSError):
+            # 空文件无法映射，部分文件系统不支持mmap
+            head = f.read(size)
+
+    if len(head) == size:
+        cut = head.rfind(b'\n')
+        if cut > 0:
+            head = head[:cut + 1]
+    return head
+
+
+@functools.lru_cache(maxsize=16)
+def _load_preview_sample(file_path, file_size, mtime_ns):
+    head = read_head(file_path)
+    blocks = (head[i:i + ENCODING_BLOCK_SIZE] for i in range(0, len(head), ENCODING_BLOCK_SIZE))
+    encoding = _detect_blocks(blocks) or 'utf-8'
+    if encoding.lower() == 'ascii':
+        # 开头全是ASCII不代表后面也是，按兼容的UTF-8解码
+        encoding = 'utf-8'
+
+    text = head.decode(encoding, errors='replace')
+    try:
+        delimiter, quotechar = sniff_dialect(text)
+    except csv.Error:
+        delimiter, quotechar = None, None
+
+    return {
+        "text": text,
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "quotechar": quotechar,
+        "truncated": file_size > len(head),
+    }
+
+
+def load_preview_sample(file_path):
+    """读取文件开头的样本及检测到的编码和格式，按路径、大小和修改时间缓存
+
+    返回的字典由缓存共享，调用方不要修改。
+    """
+    stat = os.stat(file_path)
+    return _load_preview_sample(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+def resolve_csv_options(file_path, encoding="auto", delimiter="auto", quotechar="auto"):
+    """将取值为 auto 的参数替换为检测结果"""
+    if encoding == "auto":
+        encoding = detect_encoding(file_path)
+
+    if delimiter == "auto" or quotechar == "auto":
+        try:
+            detected_delimiter, detected_quotechar = detect_dialect(file_path, encoding)
+        except csv.Error:
+            detected_delimiter, detected_quotechar = ',', '"'
+        if delimiter == "auto":
+            delimiter = detected_delimiter
+        if quotechar == "auto":
+            quotechar = detected_quotechar
+
+    return encoding, delimiter, quotechar
+
+
+def read_csv(file_path, encoding, delimiter, quotechar, **kwargs):
+    """GUI 与命令行共用的解析入口，quotechar 为 None 时不处理引号"""
+    import pandas as pd
+
+    if quotechar is None:
+        kwargs.setdefault("quoting", csv.QUOTE_NONE)
+
+    return pd.read_csv(
+        file_path,
+        encoding=encoding,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        engine='python',
+        **kwargs
+    )
+
+
+def infer_column_dtype(series):
+    """为单列推断更紧凑的类型，无法优化时返回当前类型"""
+    import numpy as np
+    import pandas as pd
+
+    current = str(series.dtype)
+    non_null = series.dropna()
+    if non_null.empty:
+        return current
+    has_null = len(non_null) < len(series)
+
+    if pd.api.types.is_bool_dtype(series):
+        return current
+
+    if pd.api.types.is_numeric_dtype(series):
+        values = non_null.astype("float64")
+        if (values == values.round()).all():
+            lo, hi = values.min(), values.max()
+            for dtype in INT_DTYPES:
+                info = np.iinfo(dtype)
+                if info.min <= lo and hi <= info.max:
+                    return dtype.capitalize() if has_null else dtype
+            return current
+        # 只有无损时才降为 float32，避免写出后出现精度误差
+        if np.array_equal(values.astype("float32").astype("float64"), values):
+            return "float32"
+        return current
+
+    if series.dtype == object or pd.api.types.is_string_dtype(series):
+        if non_null.isin([True, False]).all():
+            return "boolean"
+
+        text = non_null.astype(str)
+        if text.str.match(DATE_PATTERN).all():
+            if pd.to_datetime(text, errors="coerce").notna().all():
+                return "datetime64[ns]"
+
+        if non_null.nunique() <= len(non_null) * CATEGORY_MAX_RATIO:
+            return "category"
+
+    return current
+
+
+def infer_dtypes(df):
+    """根据样本推断各列的紧凑类型，返回 {列名: 类型}"""
+    return {col: infer_column_dtype(df[col]) for col in df.columns}
+
+
+def convert_column(series, dtype):
+    import numpy as np
+    import pandas as pd
+
+    if dtype.startswith("datetime"):
+        converted = pd.to_datetime(series, errors="coerce")
+        if converted.notna().sum() != series.notna().sum():
+            raise ValueError("存在无法解析的日期")
+        return converted
+
+    if dtype.lower() in INT_DTYPES:
+        numeric = pd.to_numeric(series)
+        non_null = numeric.dropna()
+        # 类型按样本推断，样本之外出现小数时不能截断
+        if not (non_null == non_null.round()).all():
+            raise ValueError("存在小数，无法无损转换为整数")
+        if not non_null.empty:
+            # 样本之外的分块可能超出建议的范围，此时逐级放宽到能容纳的整数类型
+            lo, hi = non_null.min(), non_null.max()
+            candidates = INT_DTYPES[INT_DTYPES.index(dtype.lower()):]
+            fitting = [t for t in candidates if np.iinfo(t).min <= lo and hi <= np.iinfo(t).max]
+            if not fitting:
+                raise OverflowError(f"数值超出 {dtype} 范围")
+            dtype = fitting[0]
+        if non_null.size != numeric.size:
+            # 出现空值时改用可空整数，避免转换失败
+            dtype = dtype.capitalize()
+        return numeric.astype(dtype)
+
+    if dtype == "float32":
+        numeric = pd.to_numeric(series)
+        converted = numeric.astype("float32")
+        restored = converted.astype("float64")
+        if not ((restored == numeric) | numeric.isna()).all():
+            raise ValueError("float32 精度不足，无法无损转换")
+        return converted
+
+    return series.astype(dtype)
+
+
+def apply_dtypes(df, dtypes):
+    """逐列应用推断出的类型，某列在当前分块中无法转换时保留原类型"""
+    for col, dtype in dtypes.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        try:
+            df[col] = convert_column(df[col], dtype)
+        except (ValueError, TypeError, OverflowError) as e:
+            logger.warning(f"列 {col} 无法转换为 {dtype}，保留原类型: {e}")
+    return df
+
+
+def concat_chunks(dfs):
+    """合并分块，分类列先统一类别，防止合并后退化为 object"""
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    if not dfs:
+        return pd.DataFrame()
+
+    if len(dfs) > 1:
+        for col in dfs[0].columns:
+            if all(isinstance(d[col].dtype, pd.CategoricalDtype) for d in dfs if col in d):
+                categories = union_categoricals([d[col] for d in dfs if col in d]).categories
+                for d in dfs:
+                    if col in d:
+                        d[col] = d[col].cat.set_categories(categories)
+
+    return pd.concat(dfs, ignore_index=True)
+
+
+def memory_report(df, dtypes):
+    """对比样本应用类型前后每列的内存占用（字节）"""
+    import pandas as pd
+
+    before = df.memory_usage(index=False, deep=True)
+    after = apply_dtypes(df.copy(), dtypes).memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        "原类型": df.dtypes.astype(str),
+        "建议类型": pd.Series(dtypes),
+        "原大小": before,
+        "优化后": after,
+    })
+    report.index.name = "列名"
+    return report
+
+
+def format_memory_report(report):
+    before = int(report["原大小"].sum())
+    after = int(report["优化后"].sum())
+    saved = (1 - after / before) * 100 if before else 0
+    return f"{report.to_string()}\n合计: {before} 字节 -> {after} 字节 (节省 {saved:.1f}%)\n"
+
+
+def get_output_path(file_path, output_format="xlsx", output_dir=None):
+    dir_name = output_dir or os.path.dirname(file_path)
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(dir_name, f"{base_name}{OUTPUT_SUFFIX}{OUTPUT_FORMATS[output_format]}")
+
+
+def settings_path(output_path):
+    """输出文件旁的隐藏文件，记录生成该输出时使用的转换选项"""
+    dir_name, base_name = os.path.split(output_path)
+    return os.path.join(dir_name, f".{base_name}.settings")
+
+
+def partial_path(output_path):
+    """转换过程中写入的临时文件，成功后才替换为 output_path；保留扩展名，供按扩展名选择写入方式的库使用"""
+    dir_name, base_name = os.path.split(output_path)
+    stem, ext = os.path.splitext(base_name)
+    return os.path.join(dir_name, f".{stem}.partial{ext}")
+
+
+def settings_hash(**settings):
+    payload = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def is_up_to_date(file_path, output_path, digest=None):
+    """输出文件比源文件新，且生成时的选项摘要与 digest 相同（digest 为 None 时只比较时间）"""
+    if not (os.path.exists(output_path) and
+            os.path.getmtime(output_path) >= os.path.getmtime(file_path)):
+        return False
+    if digest is None:
+        return True
+    try:
+        with open(settings_path(output_path), encoding="utf-8") as f:
+            return f.read().strip() == digest
+    except OSError:
+        return False
+
+
+def write_output(chunks, output_path, output_format, dtypes=None):
+    """将分块数据写入目标格式，返回写入的行数"""
+    rows = 0
+    if dtypes:
+        chunks = (apply_dtypes(chunk, dtypes) for chunk in chunks)
+
+    if output_format == "csv":
+        # 清洗后的CSV可以逐块追加，无需在内存中合并
+        with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=(i == 0))
+                rows += len(chunk)
+        return rows
+
+    dfs = []
+    for chunk in chunks:
+        dfs.append(chunk)
+        rows += len(chunk)
+    df = concat_chunks(dfs)
+
+    if output_format == "parquet":
+        df.to_parquet(output_path, index=False)
+    else:
+        df.to_excel(output_path, index=False, engine='openpyxl')
+    return rows
+
+
+def convert_file(file_path, output_format="xlsx", encoding="auto", delimiter="auto",
+                 quotechar="auto", output_dir=None, force=False, optimize_dtypes=False):
+    """转换单个CSV文件，供进程池中的工作进程调用
+
+    返回包含状态、行数、字节数和耗时的字典，异常不会向外抛出
+    """
+    start = time.perf_counter()
+    output_path = get_output_path(file_path, output_format, output_dir)
+    result = {
+        "file": file_path,
+        "output": output_path,
+        "status": "ok",
+        "rows": 0,
+        "bytes": os.path.getsize(file_path),
+        "seconds": 0.0,
+        "error": None,
+    }
+
+    # 编码、分隔符等选项改变时输出内容也会不同，不能只凭修改时间跳过
+    digest = settings_hash(output_format=output_format, encoding=encoding, delimiter=delimiter,
+                           quotechar=quotechar, optimize_dtypes=optimize_dtypes)
+
+    try:
+        if not force and is_up_to_date(file_path, output_path, digest):
+            result["status"] = "skipped"
+            return result
+
+        # 先删除旧的选项记录，中途失败时下次运行不会把旧输出当作最新
+        if os.path.exists(settings_path(output_path)):
+            os.remove(settings_path(output_path))
+
+        encoding, delimiter, quotechar = resolve_csv_options(file_path, encoding, delimiter, quotechar)
+        dtypes = None
+        if optimize_dtypes:
+            sample = read_csv(file_path, encoding, delimiter, quotechar, nrows=DTYPE_SAMPLE_ROWS)
+            dtypes = infer_dtypes(sample)
+        chunks = read_csv(file_path, encoding, delimiter, quotechar, chunksize=CHUNK_SIZE)
+        # 写入临时文件，成功后再替换，失败时不会留下截断的输出
+        result["rows"] = write_output(chunks, partial_path(output_path), output_format, dtypes)
+        os.replace(partial_path(output_path), output_path)
+        with open(settings_path(output_path), "w", encoding="utf-8") as f:
+            f.write(digest)
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+        if os.path.exists(partial_path(output_path)):
+            os.remove(partial_path(output_path))
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+    return result
+
+
+def collect_csv_files(patterns):
+    """展开目录与通配符，排除本工具生成的输出文件"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.csv"))
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        for path in matches:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            if os.path.isfile(path) and not stem.endswith(OUTPUT_SUFFIX):
+                files.append(os.path.abspath(path))
+    return sorted(set(files))
+
+
+def batch_convert(files, workers=None, **options):
+    """使用进程池并行转换，每个工作进程一次处理一个文件"""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    results = []
+    if not files:
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(convert_file, path, **options): path for path in files}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["status"] == "ok":
+                logger.info(f"已转换: {result['file']} -> {result['output']} "
+                            f"({result['rows']} 行, {result['seconds']:.2f}s)")
+            elif result["status"] == "skipped":
+                logger.info(f"已是最新，跳过: {result['file']}")
+            else:
+                logger.error(f"转换失败: {result['file']} - {result['error']}")
+
+    return results
+
+
+def format_summary(results, elapsed):
+    converted = [r for r in results if r["status"] == "ok"]
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    failed = sum(1 for r in results if r["status"] == "error")
+    rows = sum(r["rows"] for r in converted)
+    size_mb = sum(r["bytes"] for r in converted) / (1024 * 1024)
+    elapsed = max(elapsed, 1e-9)
+
+    return (
+        f"文件: {len(results)} (转换 {len(converted)}, 跳过 {skipped}, 失败 {failed})\n"
+        f"行数: {rows}, 数据量: {size_mb:.2f} MB, 耗时: {elapsed:.2f}s\n"
+        f"吞吐量: {rows / elapsed:.0f} 行/s, {size_mb / elapsed:.2f} MB/s"
+    )
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="批量转换不规范的CSV文件（无界面模式）")
+    parser.add_argument("inputs", nargs="+", help="CSV文件、目录或通配符（如 'exports/**/*.csv'）")
+    parser.add_argument("-f", "--format", choices=sorted(OUTPUT_FORMATS), default="xlsx",
+                        help="输出格式，默认 xlsx")
+    parser.add_argument("-d", "--delimiter", default="auto", help="分隔符，默认 auto 自动检测，\\t 表示制表符")
+    parser.add_argument("-q", "--quotechar", default="auto", help="文本限定符，默认 auto，none 表示不处理引号")
+    parser.add_argument("-e", "--encoding", default="auto", help="文件编码，默认 auto 自动检测")
+    parser.add_argument("-o", "--output-dir", help="输出目录，默认与源文件相同")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并行进程数，默认使用全部CPU核心")
+    parser.add_argument("--force", action="store_true", help="即使输出文件已是最新也重新转换")
+    parser.add_argument("--optimize-dtypes", action="store_true",
+                        help="根据样本推断紧凑的列类型（整数降级、分类、日期、可空类型）")
+    return parser.parse_args(argv)
+
+
+def run_cli(argv):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    delimiter = '\t' if args.delimiter == '\\t' else args.delimiter
+    quotechar = None if args.quotechar.lower() == 'none' else args.quotechar
+
+    files = collect_csv_files(args.inputs)
+    if not files:
+        logger.warning("没有找到需要转换的CSV文件")
+        return 1
+
+    # -o 配合递归通配符时，不同目录下的同名文件会写到同一个输出，并行转换时互相覆盖
+    sources = {}
+    for path in files:
+        sources.setdefault(get_output_path(path, args.format, args.output_dir), []).append(path)
+    conflicts = {output: paths for output, paths in sources.items() if len(paths) > 1}
+    if conflicts:
+        for output, paths in conflicts.items():
+            logger.error(f"多个文件会输出到同一路径 {output}: {', '.join(paths)}")
+        logger.error("请分别指定输出目录或分批转换")
+        return 2
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    logger.info(f"共 {len(files)} 个文件待处理")
+    start = time.perf_counter()
+    results = batch_convert(
+        files,
+        workers=args.jobs,
+        output_format=args.format,
+        encoding=args.encoding,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        output_dir=args.output_dir,
+        force=args.force,
+        optimize_dtypes=args.optimize_dtypes
+    )
+    print(format_summary(results, time.perf_counter() - start))
+    return 1 if any(r["status"] == "error" for r in results) else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(run_cli(argv))
+
+    try:
+        from tools.csv_import_gui import CSVImporter
+    except ImportError:
+        print("错误：图形界面需要Tkinter支持，请安装 python3-tk，或使用命令行参数以无界面模式运行")
+        sys.exit(1)
+
+    app = CSVImporter()
+    app.root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,217 @@
+"""将CSV每行合并为一个单元格，并按分隔符分列输出XLSX"""
+import csv
+import io
+import os
+import sys
+import argparse
+import subprocess
+
+
+BATCH_SIZE = 10000
+
+
+def _rejoin_lines(rows, terminators):
+    """单元格内含换行时csv会拆成多行，这里用原来的换行符把它们接回同一行"""
+    fields = list(rows[0])
+    for row, terminator in zip(rows[1:], terminators):
+        if not fields:
+            fields = ['']
+        fields[-1] += terminator + (row[0] if row else '')
+        fields.extend(row[1:])
+    return fields
+
+
+def _split_one(value, fmt):
+    # newline='' 时按 \r、\n、\r\n 拆行并保留行尾，记下每条记录结束时的换行符
+    lines = io.StringIO(value, newline='')
+    current = ['']
+
+    def read_lines():
+        for line in lines:
+            current[0] = line
+            yield line
+
+    rows, terminators = [], []
+    for row in csv.reader(read_lines(), **fmt):
+        rows.append(row)
+        line = current[0]
+        terminators.append(line[len(line.rstrip('\r\n')):])
+    return _rejoin_lines(rows, terminators) if rows else ['']
+
+
+def _fit_columns(fields, separator, max_columns):
+    """超出部分合并回最后一列，不足部分补空，保证每行列数一致"""
+    if len(fields) > max_columns:
+        fields = fields[:max_columns - 1] + [separator.join(fields[max_columns - 1:])]
+    elif len(fields) < max_columns:
+        fields = fields + [''] * (max_columns - len(fields))
+    return fields
+
+
+def split_fields(values, separator=';', quotechar='"', escapechar=None, max_columns=None):
+    """按分隔符拆分一批字符串，引号内的分隔符不会被拆开
+
+    整批交给csv模块的C实现解析；某批中有跨行或引号不成对的值导致行数对不上时，
+    该批退回逐个解析。分隔符不是单个字符时无法使用csv模块，直接按字符串拆分。
+    """
+    values = list(values)
+
+    if len(separator) != 1:
+        rows = [value.split(separator) for value in values]
+    else:
+        fmt = {
+            "delimiter": separator,
+            "quotechar": quotechar or '"',
+            "quoting": csv.QUOTE_MINIMAL if quotechar else csv.QUOTE_NONE,
+            "escapechar": escapechar,
+        }
+        try:
+            rows = list(csv.reader(values, **fmt))
+        except csv.Error:
+            rows = None
+        if rows is None or len(rows) != len(values):
+            rows = [_split_one(value, fmt) for value in values]
+        else:
+            rows = [row if row else [''] for row in rows]
+
+    if max_columns:
+        rows = [_fit_columns(row, separator, max_columns) for row in rows]
+    return rows
+
+
+def iter_split_fields(values, batch_size=BATCH_SIZE, **options):
+    """分批调用 split_fields，适合逐行流式处理的大文件"""
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) >= batch_size:
+            yield from split_fields(batch, **options)
+            batch = []
+    if batch:
+        yield from split_fields(batch, **options)
+
+
+def get_output_paths(input_csv_file):
+    """根据输入文件自动生成合并结果和分列结果的XLSX路径"""
+    csv_dir = os.path.dirname(input_csv_file)  # 获取目录路径
+    base_name = os.path.splitext(os.path.basename(input_csv_file))[0]  # 获取文件名（不带扩展名）
+
+    output_xlsx_file = os.path.join(csv_dir, f"{base_name}_output.xlsx")
+    split_output_xlsx_file = os.path.join(csv_dir, f"{base_name}_split_output.xlsx")
+    return output_xlsx_file, split_output_xlsx_file
+
+
+def merge_and_split(input_csv_file, output_xlsx_file=None, split_output_xlsx_file=None,
+                    keep_merged=True, separator=';', encoding='utf-8',
+                    quotechar='"', escapechar=None, max_columns=None):
+    """单次遍历CSV：每行合并成一个单元格，同时按分隔符分列
+
+    两个结果都通过只写模式的工作簿流式写出，不再保存后重新读取中间文件。
+    keep_merged 为 False 时不生成合并后的XLSX。分列规则见 split_fields。
+    返回 (合并结果路径或None, 分列结果路径, 行数)。
+    """
+    from openpyxl import Workbook
+
+    default_merged, default_split = get_output_paths(input_csv_file)
+    output_xlsx_file = output_xlsx_file or default_merged
+    split_output_xlsx_file = split_output_xlsx_file or default_split
+
+    merged_wb = merged_ws = None
+    if keep_merged:
+        merged_wb = Workbook(write_only=True)
+        merged_ws = merged_wb.create_sheet("Sheet")
+
+    split_wb = Workbook(write_only=True)
+    split_ws = split_wb.create_sheet("Sheet")
+
+    def merged_cells():
+        nonlocal row_count
+        with open(input_csv_file, mode='r', encoding=encoding, newline='') as csv_file:
+            for row in csv.reader(csv_file):
+                merged_cell = ''.join(row)  # 合并行中的所有单元格
+                if merged_ws is not None:
+                    merged_ws.append([merged_cell])
+                row_count += 1
+                if merged_cell:
+                    yield merged_cell
+
+    row_count = 0
+    split_rows = iter_split_fields(
+        merged_cells(),
+        separator=separator,
+        quotechar=quotechar,
+        escapechar=escapechar,
+        max_columns=max_columns
+    )
+    for split_values in split_rows:  # 按分隔符分列
+        split_ws.append(split_values)
+
+    if merged_wb is not None:
+        merged_wb.save(output_xlsx_file)
+    else:
+        output_xlsx_file = None
+    split_wb.save(split_output_xlsx_file)
+
+    return output_xlsx_file, split_output_xlsx_file, row_count
+
+
+def open_file(path):
+    """ 跨平台文件打开方法 """
+    if os.name == "nt":  # Windows系统
+        os.startfile(path)
+    else:  # macOS/Linux系统
+        subprocess.run(["open", path])  # macOS使用open命令
+
+
+def select_input_file():
+    """弹出对话框选择CSV文件，仅在未通过命令行指定文件时使用"""
+    from tkinter import Tk
+    from tkinter.filedialog import askopenfilename
+
+    root = Tk()
+    root.withdraw()  # 隐藏Tkinter的主窗口
+    input_csv_file = askopenfilename(title="选择要读取的CSV文件", filetypes=[("CSV Files", "*.csv")])
+    root.destroy()
+    return input_csv_file
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="将CSV每行合并为一个单元格，并按分隔符分列输出XLSX")
+    parser.add_argument("input", nargs="?", help="CSV文件路径，省略时弹出文件选择对话框")
+    parser.add_argument("-s", "--separator", default=';', help="分列使用的分隔符，默认 ;")
+    parser.add_argument("-q", "--quotechar", default='"', help="分列时的引号字符，none 表示不处理引号")
+    parser.add_argument("--escapechar", default=None, help="分列时的转义字符，默认不使用")
+    parser.add_argument("-n", "--max-columns", type=int, default=None,
+                        help="最多分成几列，多余内容并入最后一列，不足的补空")
+    parser.add_argument("-e", "--encoding", default='utf-8', help="CSV文件编码，默认 utf-8")
+    parser.add_argument("--no-merged", action="store_true", help="不生成合并后的中间XLSX文件")
+    parser.add_argument("--no-open", action="store_true", help="完成后不自动打开分列结果")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    input_csv_file = args.input or select_input_file()
+    if not input_csv_file:
+        print("未选择文件，程序退出。")
+        return
+
+    _, split_output_xlsx_file, row_count = merge_and_split(
+        input_csv_file,
+        keep_merged=not args.no_merged,
+        separator=args.separator,
+        encoding=args.encoding,
+        quotechar=None if args.quotechar.lower() == 'none' else args.quotechar,
+        escapechar=args.escapechar,
+        max_columns=args.max_columns
+    )
+    print(f"已处理 {row_count} 行，分列结果：{split_output_xlsx_file}")
+
+    # 打开分列后的文件
+    if not args.no_open:
+        open_file(split_output_xlsx_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,555 @@
+"""用无头浏览器抓取网站并生成HTML站点地图
+
+访问每个页面时一并记录状态码、标题、meta robots、canonical、响应大小和页面内的链接，
+写入SQLite（见 LinkStore），报告中列出各页入链数、失效的站内链接、孤立页面和没有站内链接的 canonical 目标。
+playwright 和 tqdm 在开始抓取时才导入，日志在入口函数中配置，导入本模块没有副作用。
+"""
+import asyncio
+import html
+import os
+import sqlite3
+import sys
+import argparse
+from urllib.parse import urlparse, urljoin, urldefrag
+from datetime import datetime
+import logging
+from typing import Dict, Iterable, List, Optional
+import re
+
+logger = logging.getLogger(__name__)
+
+# 一次 evaluate 取回页面元数据和全部链接，不必为每项单独往返浏览器
+PAGE_INFO_SCRIPT = """() => ({
+    title: document.title,
+    robots: document.querySelector('meta[name="robots" i]')?.content ?? null,
+    canonical: document.querySelector('link[rel~="canonical" i]')?.href ?? null,
+    links: Array.from(document.querySelectorAll('a[href]'), a => a.href),
+})"""
+
+LINK_STORE_SCHEMA = """
+PRAGMA journal_mode = MEMORY;
+PRAGMA synchronous = OFF;
+DROP TABLE IF EXISTS edges;
+DROP TABLE IF EXISTS canonicals;
+DROP TABLE IF EXISTS urls;
+CREATE TABLE urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    depth INTEGER,           -- 抓取时的深度，只被链接而未抓取的为 NULL
+    status INTEGER,
+    title TEXT,
+    robots TEXT,
+    canonical TEXT,
+    content_length INTEGER,
+    error TEXT
+);
+CREATE TABLE edges (
+    src INTEGER NOT NULL,
+    dst INTEGER NOT NULL,
+    PRIMARY KEY (src, dst)
+) WITHOUT ROWID;
+CREATE INDEX edges_dst ON edges (dst, src);
+-- 指向本站其他URL的 canonical，目标不加入 urls，以免未抓取的目标被当作孤立页面
+CREATE TABLE canonicals (
+    page INTEGER PRIMARY KEY,
+    target TEXT NOT NULL
+);
+"""
+
+# 入链只计其他页面的链接，页面指向自身的链接不算
+INBOUND_SQL = "(SELECT COUNT(*) FROM edges e WHERE e.dst = u.id AND e.src != u.id)"
+
+PAGES_SQL = f"""
+SELECT u.url, u.depth, u.status, u.title, u.robots, u.canonical, u.content_length, {INBOUND_SQL}
+FROM urls u WHERE u.depth IS NOT NULL ORDER BY u.depth, u.url
+"""
+
+BROKEN_LINKS_SQL = """
+SELECT s.url, d.url, d.status, d.error
+FROM edges e JOIN urls d ON d.id = e.dst JOIN urls s ON s.id = e.src
+WHERE d.status >= 400 OR d.error IS NOT NULL
+ORDER BY d.url, s.url
+"""
+
+ORPHANS_SQL = f"""
+SELECT u.url, u.status, u.title FROM urls u
+WHERE u.depth IS NOT NULL AND u.url != ? AND {INBOUND_SQL} = 0
+ORDER BY u.url
+"""
+
+UNLINKED_CANONICALS_SQL = """
+SELECT p.url, c.target FROM canonicals c JOIN urls p ON p.id = c.page
+WHERE NOT EXISTS (
+    SELECT 1 FROM urls t JOIN edges e ON e.dst = t.id WHERE t.url = c.target AND e.src != t.id
+)
+ORDER BY p.url
+"""
+
+HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Website Sitemap</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; -webkit-font-smoothing: antialiased; }}
+        h1 {{ color: #333; border-bottom: 1px solid #eee; padding-bottom: 10px; }}
+        .depth {{ margin-left: 20px; margin-bottom: 20px; }}
+        .url {{ margin: 5px 0; color: #0066cc; word-break: break-all; }}
+        .stats {{ padding: 10px; background: #f5f5f5; border-radius: 5px; margin-bottom: 20px; }}
+        .error {{ color: #d9534f; }}
+        .meta {{ color: #777; font-size: 0.9em; }}
+    </style>
+</head>
+<body>
+    <h1>Sitemap for {domain}</h1>
+    <div class="stats">
+        <p>Generated on: {date}</p>
+        <p>Total URLs: {total_urls}</p>
+        <p>Internal Links: {total_links}</p>
+        <p>Broken Internal Links: {broken_links}</p>
+        <p>Orphan Pages: {orphans}</p>
+        <p>Canonical Targets Not Linked: {unlinked_canonicals}</p>
+        <p>Max Depth: {max_depth}</p>
+    </div>
+"""
+
+HTML_FOOTER = """</body>
+</html>"""
+
+
+class LinkStore:
+    """抓取结果的SQLite存储
+
+    URL 映射为整数ID，页面元数据存在 urls 表，链接关系只存 (源ID, 目标ID) 两列，
+    同一页面到同一目标的多个链接记为一条。报告通过SQL逐行读取，
+    页面和链接再多也不必全部载入内存。每次抓取清空同名文件中的旧表。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(LINK_STORE_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def add_url(self, url: str) -> None:
+        self.conn.execute("INSERT OR IGNORE INTO urls (url) VALUES (?)", (url,))
+
+    def claim(self, url: str, depth: int) -> bool:
+        """把URL标记为在 depth 层抓取；已经抓取过的返回 False"""
+        self.add_url(url)
+        cursor = self.conn.execute("UPDATE urls SET depth = ? WHERE url = ? AND depth IS NULL", (depth, url))
+        return cursor.rowcount == 1
+
+    def record_page(self, url: str, status: Optional[int], title: Optional[str], robots: Optional[str],
+                    canonical: Optional[str], content_length: Optional[int]) -> None:
+        self.conn.execute(
+            "UPDATE urls SET status = ?, title = ?, robots = ?, canonical = ?, content_length = ?, error = NULL "
+            "WHERE url = ?",
+            (status, title, robots, canonical, content_length, url)
+        )
+
+    def record_canonical(self, url: str, target: str) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO canonicals (page, target) SELECT id, ? FROM urls WHERE url = ?", (target, url)
+        )
+
+    def record_error(self, url: str, error: str) -> None:
+        self.conn.execute("UPDATE urls SET error = ? WHERE url = ?", (error, url))
+        self.conn.commit()
+
+    def add_edges(self, source: str, targets: Iterable[str]) -> None:
+        """记录 source 页面上指向 targets 的链接，每抓完一页提交一次"""
+        targets = list(targets)
+        self.conn.executemany("INSERT OR IGNORE INTO urls (url) VALUES (?)", ((url,) for url in targets))
+        (source_id,) = self.conn.execute("SELECT id FROM urls WHERE url = ?", (source,)).fetchone()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO edges (src, dst) SELECT ?, id FROM urls WHERE url = ?",
+            ((source_id, url) for url in targets)
+        )
+        self.conn.commit()
+
+    def depth_counts(self) -> List[tuple]:
+        return self.conn.execute(
+            "SELECT depth, COUNT(*) FROM urls WHERE depth IS NOT NULL GROUP BY depth ORDER BY depth"
+        ).fetchall()
+
+    def pages(self):
+        """按深度和URL依次返回已抓取页面：(url, depth, status, title, robots, canonical, 大小, 入链数)"""
+        return self.conn.execute(PAGES_SQL)
+
+    def broken_links(self):
+        """指向出错页面（状态码 >= 400 或抓取失败）的站内链接：(来源, 目标, 状态码, 错误)"""
+        return self.conn.execute(BROKEN_LINKS_SQL)
+
+    def orphans(self, start_url: str):
+        """除起始页外没有任何其他页面链接到的已抓取页面：(url, status, title)
+
+        按链接抓取时每个页面都是经链接发现的，孤立页面只会来自 --seeds 列出的URL。
+        """
+        return self.conn.execute(ORPHANS_SQL, (start_url,))
+
+    def unlinked_canonicals(self):
+        """canonical 指向的本站URL没有任何页面链接：(页面, canonical 目标)"""
+        return self.conn.execute(UNLINKED_CANONICALS_SQL)
+
+    def stats(self, start_url: str) -> Dict[str, int]:
+        pages, failed = self.conn.execute("SELECT COUNT(depth), COUNT(error) FROM urls").fetchone()
+        (links,) = self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()
+        (broken,) = self.conn.execute(f"SELECT COUNT(*) FROM ({BROKEN_LINKS_SQL})").fetchone()
+        (orphans,) = self.conn.execute(f"SELECT COUNT(*) FROM ({ORPHANS_SQL})", (start_url,)).fetchone()
+        (canonicals,) = self.conn.execute(f"SELECT COUNT(*) FROM ({UNLINKED_CANONICALS_SQL})").fetchone()
+        return {"pages": pages, "failed": failed, "links": links, "broken_links": broken, "orphans": orphans,
+                "unlinked_canonicals": canonicals}
+
+
+class SitemapGenerator:
+    def __init__(
+            self,
+            max_depth: int = 3,
+            exclude_extensions: Optional[List[str]] = None,
+            max_concurrency: int = 5,
+            request_timeout: int = 30000,
+            max_retries: int = 2,
+            db_path: Optional[str] = None
+    ):
+        self.max_depth = max_depth
+        self.exclude_extensions = exclude_extensions or [".pdf", ".jpg", ".png", ".zip"]
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        # 默认与输出的HTML同名，扩展名为 .db
+        self.db_path = db_path
+
+        self.failed_urls: Dict[str, str] = {}
+        self.domain: str = ""
+        self.start_url: str = ""
+        self.store: Optional[LinkStore] = None
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.progress_bar = None
+
+    @staticmethod
+    async def content_length(response) -> Optional[int]:
+        """优先取 Content-Length 响应头，没有时（如分块传输）用响应体的长度"""
+        if response is None:
+            return None
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            return int(length)
+        try:
+            return len(await response.body())
+        except Exception:
+            return None
+
+    async def get_links(self, page, url: str, retry_count: int = 0) -> List[str]:
+        """打开页面，把状态码、标题等元数据写入 self.store，返回页面上去重后的链接"""
+        try:
+            async with self.semaphore:
+                response = await page.goto(url, timeout=self.request_timeout)
+                await page.wait_for_load_state("networkidle", timeout=self.request_timeout)
+                info = await page.evaluate(PAGE_INFO_SCRIPT)
+                # canonical 与链接一样去掉锚点，只在指向其他页面时单独记录
+                canonical = urldefrag(urljoin(url, info["canonical"]))[0] if info["canonical"] else None
+
+                self.store.record_page(
+                    url,
+                    status=response.status if response else None,
+                    title=info["title"],
+                    robots=info["robots"],
+                    canonical=canonical,
+                    content_length=await self.content_length(response),
+                )
+                if canonical and canonical != url and self.is_valid_url(canonical):
+                    self.store.record_canonical(url, canonical)
+
+                # 去掉锚点，同一页面的不同锚点视为同一个URL
+                links = (
+                    urldefrag(urljoin(url, link))[0]
+                    for link in info["links"]
+                    if link and not link.startswith(("javascript:", "mailto:", "#", "tel:"))
+                )
+                return list(dict.fromkeys(links))
+        except Exception as e:
+            if retry_count < self.max_retries:
+                logger.warning(f"Retrying ({retry_count + 1}/{self.max_retries}) for {url}")
+                return await self.get_links(page, url, retry_count + 1)
+            else:
+                self.failed_urls[url] = str(e)
+                self.store.record_error(url, str(e))
+                logger.error(f"Failed to fetch {url} after {self.max_retries} retries: {str(e)}")
+                return []
+
+    def is_valid_url(self, url: str) -> bool:
+        """验证URL是否有效"""
+        try:
+            parsed = urlparse(url)
+            if not parsed.scheme or not parsed.netloc:
+                return False
+
+            if any(url.lower().endswith(ext) for ext in self.exclude_extensions):
+                return False
+
+            if parsed.netloc != self.domain:
+                return False
+
+            if not re.match(r'^https?://', url):
+                return False
+
+            return True
+        except:
+            return False
+
+    async def crawl(self, url: str, depth: int = 0) -> None:
+        from playwright.async_api import async_playwright
+        from tqdm import tqdm
+
+        if (depth > self.max_depth or
+                not self.is_valid_url(url) or
+                not self.store.claim(url, depth)):
+            return
+
+        if self.progress_bar:
+            self.progress_bar.set_description(f"Processing: {url[:50]}...")
+            self.progress_bar.update(1)
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(
+                headless=True,
+                timeout=60000
+            )
+            context = await browser.new_context(
+                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+            )
+
+            try:
+                page = await context.new_page()
+                links = [link for link in await self.get_links(page, url) if self.is_valid_url(link)]
+                self.store.add_edges(url, links)
+
+                tasks = [self.crawl(link, depth + 1) for link in links]
+                for f in tqdm(asyncio.as_completed(tasks), total=len(tasks), desc=f"Depth {depth}"):
+                    await f
+            finally:
+                await context.close()
+                await browser.close()
+
+    @staticmethod
+    def page_html(url, status, title, robots, canonical, content_length, inbound) -> str:
+        details = [str(status) if status is not None else "no response", f"inbound {inbound}"]
+        if content_length is not None:
+            details.append(f"{content_length / 1024:.1f} KB")
+        if robots and "noindex" in robots.lower():
+            details.append(html.escape(robots))
+        if canonical and canonical != url:
+            details.append(f"canonical: {html.escape(canonical)}")
+        if title:
+            details.append(html.escape(title))
+        url = html.escape(url)
+        return (f'<div class="url"><a href="{url}" target="_blank">{url}</a> '
+                f'<span class="meta">{" · ".join(details)}</span></div>\n')
+
+    def generate_html(self, output_file: str = "sitemap.html") -> Dict[str, int]:
+        """从 self.store 逐行读取生成报告，返回统计数字"""
+        try:
+            stats = self.store.stats(self.start_url)
+            depth_counts = dict(self.store.depth_counts())
+
+            with open(output_file, "w", encoding="utf-8") as f:
+                f.write(HTML_HEADER.format(
+                    domain=html.escape(self.domain),
+                    date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    total_urls=stats["pages"],
+                    total_links=stats["links"],
+                    broken_links=stats["broken_links"],
+                    orphans=stats["orphans"],
+                    unlinked_canonicals=stats["unlinked_canonicals"],
+                    max_depth=self.max_depth,
+                ))
+
+                current_depth = None
+                for url, depth, *details in self.store.pages():
+                    if depth != current_depth:
+                        if current_depth is not None:
+                            f.write("</div>\n")
+                        f.write(f'<h2>Depth {depth} ({depth_counts[depth]} URLs)</h2>\n<div class="depth">\n')
+                        current_depth = depth
+                    f.write(self.page_html(url, *details))
+                if current_depth is not None:
+                    f.write("</div>\n")
+
+                if stats["broken_links"]:
+                    f.write("<h2 class='error'>Broken Internal Links</h2><div class='depth'>\n")
+                    for source, target, status, error in self.store.broken_links():
+                        reason = html.escape(error) if error else status
+                        f.write(f'<div class="url error">{html.escape(target)} ({reason}) '
+                                f'<span class="meta">linked from {html.escape(source)}</span></div>\n')
+                    f.write("</div>\n")
+
+                if stats["orphans"]:
+                    f.write("<h2>Orphan Pages</h2><div class='depth'>\n")
+                    for url, status, title in self.store.orphans(self.start_url):
+                        details = [str(status) if status is not None else "no response"]
+                        if title:
+                            details.append(html.escape(title))
+                        f.write(f'<div class="url">{html.escape(url)} '
+                                f'<span class="meta">{" · ".join(details)}</span></div>\n')
+                    f.write("</div>\n")
+
+                if stats["unlinked_canonicals"]:
+                    f.write("<h2>Canonical Targets Not Linked</h2><div class='depth'>\n")
+                    for url, target in self.store.unlinked_canonicals():
+                        f.write(f'<div class="url">{html.escape(target)} '
+                                f'<span class="meta">canonical of {html.escape(url)}</span></div>\n')
+                    f.write("</div>\n")
+
+                if self.failed_urls:
+                    f.write("<h2 class='error'>Failed URLs</h2><div class='depth'>")
+                    f.write("".join(
+                        f'<div class="url error">{html.escape(url)} - {html.escape(error)}</div>'
+                        for url, error in self.failed_urls.items()
+                    ))
+                    f.write("</div>\n")
+                f.write(HTML_FOOTER)
+
+            logger.info(f"Sitemap generated successfully: {output_file} (link data: {self.store.path})")
+            return stats
+        except Exception as e:
+            logger.error(f"Failed to generate HTML: {str(e)}")
+            raise
+
+    async def run(self, start_url: str, output_file: str = "sitemap.html",
+                  seed_urls: Iterable[str] = ()) -> Dict[str, int]:
+        """从 start_url 开始抓取并生成报告，返回页面数、链接数、失效链接数等统计
+
+        seed_urls -- 另外从深度0开始抓取的URL（如 sitemap.xml 中列出的页面），
+                     其中没有被任何页面链接到的会列为孤立页面
+        """
+        from tqdm import tqdm
+
+        parsed_url = urlparse(start_url)
+        if not parsed_url.scheme or not parsed_url.netloc:
+            raise ValueError("Invalid URL format")
+
+        self.domain = parsed_url.netloc
+        self.start_url = start_url
+        self.store = LinkStore(self.db_path or os.path.splitext(output_file)[0] + ".db")
+
+        logger.info(f"Starting crawl for {start_url} (max depth: {self.max_depth})")
+
+        try:
+            with tqdm(total=1, desc="Crawling progress") as self.progress_bar:
+                await self.crawl(start_url)
+                for url in seed_urls:
+                    await self.crawl(url)
+
+            return self.generate_html(output_file)
+        except Exception as e:
+            logger.error(f"Crawling failed: {str(e)}")
+            raise
+        finally:
+            self.store.close()
+
+
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('sitemap_generator.log'),
+            logging.StreamHandler()
+        ]
+    )
+
+
+async def run_gui():
+    import tkinter as tk
+    from tkinter import simpledialog, messagebox
+
+    root = tk.Tk()
+    root.withdraw()
+
+    class ConfigDialog(simpledialog.Dialog):
+        def body(self, master):
+            tk.Label(master, text="URL:").grid(row=0)
+            tk.Label(master, text="Max Depth:").grid(row=1)
+
+            self.url_entry = tk.Entry(master, width=40)
+            self.depth_entry = tk.Entry(master, width=5)
+
+            self.url_entry.grid(row=0, column=1)
+            self.depth_entry.grid(row=1, column=1)
+
+            self.url_entry.insert(0, "https://")
+            self.depth_entry.insert(0, "3")
+
+            return self.url_entry
+
+        def apply(self):
+            self.result = (
+                self.url_entry.get(),
+                int(self.depth_entry.get())
+            )
+
+    try:
+        config = ConfigDialog(root, "Sitemap Generator Configuration")
+        if not config.result:
+            return
+
+        start_url, max_depth = config.result
+
+        generator = SitemapGenerator(
+            max_depth=max_depth,
+            max_concurrency=1
+        )
+
+        await generator.run(start_url)
+        messagebox.showinfo("Success", "Sitemap generated successfully!")
+    except Exception as e:
+        messagebox.showerror("Error", f"Failed to generate sitemap: {str(e)}")
+        logger.exception("Sitemap generation failed")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="抓取网站并生成HTML站点地图。不带参数运行时打开配置对话框。")
+    parser.add_argument("url", help="起始URL，只抓取同一域名下的页面")
+    parser.add_argument("-d", "--depth", type=int, default=3, help="最大抓取深度，默认 3")
+    parser.add_argument("-c", "--concurrency", type=int, default=5, help="同时打开的页面数，默认 5")
+    parser.add_argument("-o", "--output", default="sitemap.html", help="输出的HTML文件，默认 sitemap.html")
+    parser.add_argument("--db", help="保存页面信息和链接关系的SQLite文件，默认与输出文件同名、扩展名为 .db")
+    parser.add_argument("--seeds", help="文本文件，每行一个URL，与起始URL一起抓取；没有页面链接到的列为孤立页面")
+    return parser.parse_args(argv)
+
+
+def read_seeds(path):
+    """读取种子URL文件，跳过空行和 # 开头的注释行"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+async def run_cli(args):
+    generator = SitemapGenerator(max_depth=args.depth, max_concurrency=args.concurrency, db_path=args.db)
+    seeds = read_seeds(args.seeds) if args.seeds else ()
+    await generator.run(args.url, args.output, seeds)
+    return 1 if generator.failed_urls else 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # 先解析参数，只查看帮助时不创建日志文件
+    args = parse_args(argv) if argv else None
+    setup_logging()
+    try:
+        if args:
+            sys.exit(asyncio.run(run_cli(args)))
+        asyncio.run(run_gui())
+    except KeyboardInterrupt:
+        logger.info("Process interrupted by user")
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1011 @@
+"""给图片批量添加水印：单张、目录增量批处理、标准输入输出流和大图模式
+
+Pillow 在首次处理图片时才导入，只查看帮助或全部跳过时不加载。
+"""
+import io
+import os
+import sys
+import glob
+import shutil
+import contextlib
+import json
+import hashlib
+import argparse
+import functools
+from collections import OrderedDict
+import subprocess
+import platform
+
+SUPPORTED_EXT = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff')
+POSITIONS = ("top_left", "top_right", "bottom_left", "bottom_right")
+# logo宽度占原图宽度的比例
+DEFAULT_SCALE = 0.25
+LOGO_CACHE_BYTES = 64 * 1024 * 1024
+# 这些模式可以直接把logo粘贴到原图上，其余模式先转换为RGB/RGBA
+PASTE_MODES = ('RGB', 'RGBA', 'L', 'LA', 'CMYK')
+# 保存为JPEG时只支持这些模式
+JPEG_MODES = ('RGB', 'L', 'CMYK')
+# 各输出格式能直接写出的模式，其余模式保存前转换为RGB/RGBA；未列出的格式由Pillow自行处理
+SAVE_MODES = {
+    'JPEG': JPEG_MODES,
+    'PNG': ('1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I;16'),
+    'BMP': ('1', 'L', 'P', 'RGB', 'RGBA'),
+    'GIF': ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'),
+}
+# 指定输出格式时使用的扩展名，以及能写入EXIF/ICC的格式
+FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'WEBP': '.webp',
+    'AVIF': '.avif',
+    'GIF': '.gif',
+    'BMP': '.bmp',
+    'TIFF': '.tif',
+}
+METADATA_FORMATS = ('JPEG', 'PNG', 'WEBP', 'AVIF', 'TIFF')
+MANIFEST_NAME = '.watermark_manifest.json'
+MANIFEST_VERSION = 1
+# 超过该像素数的图片默认走大图模式，不整幅解码（约 8000x8000）
+LARGE_IMAGE_PIXELS = 64 * 1000 * 1000
+# 大图模式下每次读写的条带大小上限
+STRIP_BYTES = 16 * 1024 * 1024
+
+
+def open_folder(folder_path):
+    """跨平台打开文件夹"""
+    try:
+        if platform.system() == "Windows":
+            os.startfile(folder_path)
+        elif platform.system() == "Darwin":  # macOS
+            subprocess.run(["open", folder_path])
+        else:  # Linux
+            subprocess.run(["xdg-open", folder_path])
+    except Exception as e:
+        print(f"打开文件夹失败: {e}")
+
+
+def select_watermark_position():
+    """创建一个窗口让用户选择水印位置"""
+    from tkinter import Tk, Button, Frame
+
+    position_value = [None]  # 使用列表存储选择的位置
+    
+    def on_position_selected(pos):
+        position_value[0] = pos
+        position_window.destroy()
+    
+    # 创建窗口
+    position_window = Tk()
+    position_window.title("选择水印位置")
+    position_window.geometry("300x200")
+    
+    # 主框架
+    frame = Frame(position_window)
+    frame.pack(expand=True)
+    
+    # 创建按钮
+    Button(frame, text="左上角", width=10, height=2, 
+           command=lambda: on_position_selected("top_left")).grid(row=0, column=0, padx=10, pady=10)
+    
+    Button(frame, text="右上角", width=10, height=2,
+           command=lambda: on_position_selected("top_right")).grid(row=0, column=1, padx=10, pady=10)
+    
+    Button(frame, text="左下角", width=10, height=2,
+           command=lambda: on_position_selected("bottom_left")).grid(row=1, column=0, padx=10, pady=10)
+    
+    Button(frame, text="右下角", width=10, height=2,
+           command=lambda: on_position_selected("bottom_right")).grid(row=1, column=1, padx=10, pady=10)
+    
+    position_window.mainloop()
+    return position_value[0]
+
+
+def load_logo(logo_path, opacity=1.0):
+    """加载logo，opacity 小于1时按比例降低其透明度通道"""
+    from PIL import Image
+
+    logo = Image.open(logo_path).convert('RGBA')
+    if opacity < 1:
+        logo.putalpha(logo.getchannel('A').point(lambda a: round(a * opacity)))
+    return logo
+
+
+class LogoCache:
+    """按目标尺寸缓存缩放好的logo，按占用内存做LRU淘汰
+
+    同一批图片通常只有少数几种尺寸，命中缓存时可以省掉一次LANCZOS重采样。
+    Pillow 缩放RGBA时内部已按预乘透明度处理，缓存里同时保存拆出的透明度通道，
+    粘贴时直接作为蒙版使用。
+    """
+
+    def __init__(self, logo, max_bytes=LOGO_CACHE_BYTES):
+        self.logo = logo
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def size(self):
+        return self.logo.size
+
+    def get(self, size):
+        """返回 (缩放后的logo, 透明度蒙版)"""
+        item = self._items.get(size)
+        if item is not None:
+            self._items.move_to_end(size)
+            self.hits += 1
+            return item
+
+        from PIL import Image
+
+        self.misses += 1
+        resized = self.logo.resize(size, Image.Resampling.LANCZOS)
+        item = (resized, resized.getchannel('A'))
+
+        item_bytes = size[0] * size[1] * 5  # RGBA + 蒙版
+        if item_bytes <= self.max_bytes:
+            self._items[size] = item
+            self._bytes += item_bytes
+            while self._bytes > self.max_bytes:
+                (width, height), _ = self._items.popitem(last=False)
+                self._bytes -= width * height * 5
+        return item
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def format_cache_stats(stats):
+    total = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / total * 100 if total else 0
+    return f"logo缓存命中率: {hit_rate:.1f}% ({stats['hits']}/{total})"
+
+
+def list_images(input_folder, output_suffix=None):
+    """列出文件夹中支持的图片文件，跳过文件名带 output_suffix 的已输出图片"""
+    return [
+        os.path.join(input_folder, filename)
+        for filename in os.listdir(input_folder)
+        if filename.lower().endswith(SUPPORTED_EXT)
+        and not (output_suffix and os.path.splitext(filename)[0].endswith(output_suffix))
+    ]
+
+
+def calculate_position(img_size, logo_size, position, margin):
+    """根据选择的位置计算logo左上角坐标"""
+    if position == "top_right":
+        return (img_size[0] - logo_size[0] - margin, margin)
+    elif position == "bottom_right":
+        return (img_size[0] - logo_size[0] - margin, img_size[1] - logo_size[1] - margin)
+    elif position == "top_left":
+        return (margin, margin)
+    elif position == "bottom_left":
+        return (margin, img_size[1] - logo_size[1] - margin)
+    else:
+        # 默认右下角
+        return (img_size[0] - logo_size[0] - margin, img_size[1] - logo_size[1] - margin)
+
+
+def logo_size_for(img_size, logo_cache, scale=DEFAULT_SCALE):
+    """logo按原图宽度的 scale 倍缩放，保持宽高比"""
+    logo_width = max(1, int(img_size[0] * scale))
+    logo_height = int(logo_width * logo_cache.size[1] / logo_cache.size[0])
+    return logo_width, logo_height
+
+
+def apply_watermark(img, logo_cache, position="bottom_right", margin=20, scale=DEFAULT_SCALE):
+    """把logo直接粘贴到已解码的图片上，返回加好水印的图片
+
+    scale -- logo宽度占原图宽度的比例
+    只改写logo覆盖的区域，不再创建整幅的RGBA副本；原图模式可以直接粘贴时保持不变。
+    """
+    if img.mode not in PASTE_MODES:
+        has_alpha = img.mode in ('P', 'PA') and 'transparency' in img.info or img.mode == 'PA'
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+
+    # 调整logo大小，默认宽度为原图的1/4
+    logo_resized, logo_mask = logo_cache.get(logo_size_for(img.size, logo_cache, scale))
+
+    position_coords = calculate_position(img.size, logo_resized.size, position, margin)
+
+    if img.mode in ('RGBA', 'LA'):
+        # 带透明度的原图必须按alpha合成：用蒙版粘贴会把透明度通道也混合，不透明的像素会变成半透明
+        visible = _visible_area(img.size, logo_resized.size, position_coords)
+        if visible is None:
+            return img
+        dest, source = visible
+        if img.mode == 'RGBA':
+            img.alpha_composite(logo_resized, dest=dest, source=source)
+        else:
+            # LA 只转换logo覆盖的区域，合成后再转回 LA
+            box = dest + (dest[0] + source[2] - source[0], dest[1] + source[3] - source[1])
+            region = img.crop(box).convert('RGBA')
+            region.alpha_composite(logo_resized, source=source)
+            img.paste(region.convert('LA'), box)
+    else:
+        # 以logo的透明度为蒙版粘贴，只混合logo所在区域
+        img.paste(logo_resized, position_coords, logo_mask)
+    return img
+
+
+def _visible_area(img_size, logo_size, coords):
+    """logo落在图片内的部分：返回 (图片上的左上角, logo上的裁剪框)，完全在图片外时返回 None
+
+    logo比图片还大时坐标可能为负，alpha_composite 不接受负坐标，需要先裁掉图片外的部分。
+    """
+    left, top = max(coords[0], 0), max(coords[1], 0)
+    right = min(coords[0] + logo_size[0], img_size[0])
+    bottom = min(coords[1] + logo_size[1], img_size[1])
+    if right <= left or bottom <= top:
+        return None
+    return (left, top), (left - coords[0], top - coords[1], right - coords[0], bottom - coords[1])
+
+
+def available_output_formats():
+    """当前Pillow可以写出的输出格式"""
+    from PIL import Image, features
+    try:
+        # 旧版Pillow需要该插件才能读写AVIF
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+
+    Image.init()
+    return [fmt for fmt in FORMAT_EXTENSIONS
+            if fmt in Image.SAVE and (fmt != 'WEBP' or features.check('webp'))]
+
+
+def get_output_path(file_path, output_suffix, output_format=None, output_dir=None):
+    filename = os.path.basename(file_path)
+    ext = FORMAT_EXTENSIONS[output_format] if output_format else os.path.splitext(filename)[1]
+    output_filename = os.path.splitext(filename)[0] + output_suffix + ext
+    return os.path.join(output_dir or os.path.dirname(file_path), output_filename)
+
+
+def fit_size(size, max_size):
+    """按比例缩小到不超过 max_size（整数表示最长边），不会放大"""
+    if isinstance(max_size, int):
+        max_size = (max_size, max_size)
+    scale = min(max_size[0] / size[0], max_size[1] / size[1], 1)
+    return max(1, round(size[0] * scale)), max(1, round(size[1] * scale))
+
+
+def open_image(file_path, max_size=None):
+    """打开图片；指定 max_size 时，JPEG 通过 draft 在DCT阶段按 1/2、1/4、1/8 缩小解码"""
+    from PIL import Image
+
+    img = Image.open(file_path)
+    if max_size:
+        target = fit_size(img.size, max_size)
+        if target != img.size:
+            if img.format == 'JPEG':
+                img.draft(img.mode, target)
+            img.thumbnail(target, Image.Resampling.LANCZOS)
+    return img
+
+
+def save_image(img, output_path, output_format, quality=95, optimize=False, progressive=False,
+               exif=None, icc_profile=None):
+    """按输出格式设置编码参数保存，格式支持时写回EXIF和ICC"""
+    params = {}
+    modes = SAVE_MODES.get(output_format)
+    if modes and img.mode not in modes:
+        # 原图模式保持不变，例如CMYK转PNG、LA转BMP时需要在这里转换
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha and 'RGBA' in modes else 'RGB')
+    if output_format == 'JPEG':
+        params.update(quality=quality, optimize=optimize, progressive=progressive)
+    elif output_format in ('WEBP', 'AVIF'):
+        params.update(quality=quality)
+    elif output_format in ('PNG', 'GIF'):
+        params.update(optimize=optimize)
+
+    if output_format in METADATA_FORMATS:
+        if exif:
+            params['exif'] = exif
+        if icc_profile:
+            params['icc_profile'] = icc_profile
+
+    img.save(output_path, format=output_format, **params)
+
+
+def resolve_output_format(output_format):
+    """规范化输出格式名称，当前环境无法写出时报错"""
+    if not output_format:
+        return None
+    output_format = output_format.upper()
+    if output_format == 'JPG':
+        output_format = 'JPEG'
+    if output_format not in available_output_formats():
+        raise ValueError(f"当前环境不支持输出 {output_format} 格式")
+    return output_format
+
+
+def watermark_image(source, destination, logo_cache, position="bottom_right", margin=20, scale=DEFAULT_SCALE,
+                    max_size=None, output_format=None, quality=95, optimize=False, progressive=False,
+                    keep_metadata=True):
+    """读取 source 加水印后写入 destination，两者都可以是路径或二进制文件对象
+
+    logo_cache -- LogoCache，同一批图片共用以复用缩放结果
+    max_size -- 输出的最大尺寸，整数表示最长边，(宽, 高) 表示外框，默认不缩放
+    output_format -- 输出格式，如 "JPEG"、"WEBP"、"AVIF"；默认按输出路径的扩展名，
+                     写入文件对象时与原图相同
+    quality / optimize / progressive -- 编码参数
+    keep_metadata -- 是否保留原图的EXIF和ICC配置
+    """
+    from PIL import Image
+
+    output_format = resolve_output_format(output_format)
+
+    with open_image(source, max_size) as img:
+        source_format = img.format
+        exif = img.info.get('exif') if keep_metadata else None
+        icc_profile = img.info.get('icc_profile') if keep_metadata else None
+
+        watermarked = apply_watermark(img, logo_cache, position, margin, scale)
+
+        # 保存结果
+        if not output_format and isinstance(destination, str):
+            ext = os.path.splitext(destination)[1].lower()
+            output_format = Image.registered_extensions().get(ext)
+        save_image(watermarked, destination, output_format or source_format, quality, optimize, progressive,
+                   exif, icc_profile)
+
+
+@contextlib.contextmanager
+def unlimited_pixels():
+    """临时关闭Pillow的解压炸弹检查，只用于已确认要按大图处理的文件"""
+    from PIL import Image
+
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        yield
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def is_large_image(file_path, threshold=LARGE_IMAGE_PIXELS):
+    """只读取文件头判断像素数是否超过 threshold，不解码像素"""
+    from PIL import Image
+
+    with unlimited_pixels(), Image.open(file_path) as img:
+        return img.size[0] * img.size[1] > threshold
+
+
+def _raw_tiles(img):
+    """像素未压缩存放（BMP、PPM、未压缩TIFF）时返回各块的 (区域, 偏移, 原始模式, 行跨度, 行方向)
+
+    其余情况返回 None，例如压缩格式、调色板图片或编码器不支持的原始模式。
+    """
+    from PIL import Image
+
+    if img.mode not in PASTE_MODES or not img.tile:
+        return None
+    tiles = []
+    for codec, box, offset, args in img.tile:
+        if codec != 'raw':
+            return None
+        if isinstance(args, str):
+            args = (args,)
+        rawmode = args[0]
+        stride = args[1] if len(args) > 1 else 0
+        orientation = args[2] if len(args) > 2 else 1
+        try:
+            row_bytes = len(Image.new(img.mode, (box[2] - box[0], 1)).tobytes('raw', rawmode))
+        except ValueError:
+            return None
+        if stride and stride < row_bytes:
+            return None
+        tiles.append((box, offset, rawmode, stride or row_bytes, orientation))
+    return tiles
+
+
+def _patch_raw_tiles(output_path, tiles, mode, logo, mask, coords):
+    """在已复制好的文件里按条带读出logo覆盖的行，合成后原位写回"""
+    from PIL import Image
+
+    logo_box = (coords[0], coords[1], coords[0] + logo.size[0], coords[1] + logo.size[1])
+    with open(output_path, 'r+b') as f:
+        for (x0, y0, x1, y1), offset, rawmode, stride, orientation in tiles:
+            left, top = max(x0, logo_box[0]), max(y0, logo_box[1])
+            right, bottom = min(x1, logo_box[2]), min(y1, logo_box[3])
+            if left >= right or top >= bottom:
+                continue
+
+            strip_rows = max(1, STRIP_BYTES // stride)
+            for strip_top in range(top, bottom, strip_rows):
+                strip_bottom = min(strip_top + strip_rows, bottom)
+                rows = strip_bottom - strip_top
+                # 自下而上存放的行（如BMP）在文件中倒序排列
+                first_row = strip_top - y0 if orientation > 0 else y1 - strip_bottom
+                f.seek(offset + first_row * stride)
+                strip = Image.frombytes(mode, (x1 - x0, rows), f.read(rows * stride),
+                                        'raw', rawmode, stride, orientation)
+
+                crop_box = (left - coords[0], strip_top - coords[1], right - coords[0], strip_bottom - coords[1])
+                if mode == 'RGBA':
+                    strip.alpha_composite(logo.crop(crop_box), dest=(left - x0, 0))
+                elif mode == 'LA':
+                    # 与 apply_watermark 相同，LA 经 RGBA 合成，保持原图的透明度
+                    rgba = strip.convert('RGBA')
+                    rgba.alpha_composite(logo.crop(crop_box), dest=(left - x0, 0))
+                    strip = rgba.convert('LA')
+                else:
+                    strip.paste(logo.crop(crop_box), (left - x0, 0), mask.crop(crop_box))
+                f.seek(offset + first_row * stride)
+                f.write(strip.tobytes('raw', rawmode, stride, orientation))
+
+
+def _import_pyvips():
+    """libvips 是可选依赖，用到时才导入"""
+    try:
+        import pyvips
+    except (ImportError, OSError):
+        return None
+    return pyvips
+
+
+def _watermark_vips(pyvips, file_path, output_path, logo, coords, output_format, target_size=None, quality=95,
+                    optimize=False, progressive=False, keep_metadata=True):
+    """用libvips按顺序流式解码、合成、编码，内存占用与图片尺寸无关
+
+    target_size -- 需要缩小时的输出尺寸，由libvips在解码阶段缩小
+    """
+    if target_size:
+        image = pyvips.Image.thumbnail(file_path, target_size[0], height=target_size[1], size='down')
+    else:
+        image = pyvips.Image.new_from_file(file_path, access='sequential')
+
+    overlay = pyvips.Image.new_from_memory(logo.tobytes(), logo.size[0], logo.size[1], 4, 'uchar')
+    result = image.composite2(overlay.copy(interpretation='srgb'), 'over', x=coords[0], y=coords[1])
+    result = result.extract_band(0, n=image.bands).cast(image.format)
+
+    params = {}
+    if output_format in ('JPEG', 'WEBP', 'AVIF'):
+        params['Q'] = quality
+    if output_format == 'JPEG':
+        params.update(optimize_coding=optimize, interlace=progressive)
+    if not keep_metadata:
+        if pyvips.at_least_libvips(8, 15):
+            params['keep'] = 'none'
+        else:
+            params['strip'] = True
+    result.write_to_file(output_path, **params)
+
+
+def watermark_large_image(file_path, output_path, logo_cache, position="bottom_right", margin=20,
+                          scale=DEFAULT_SCALE, max_size=None, output_format=None, **options):
+    """大图模式：不整幅解码，只在logo覆盖的区域按原分辨率合成
+
+    依次尝试：
+    1. BMP、PPM、未压缩TIFF 等像素原样存放的文件，在不改格式、不缩放、保留元数据时，
+       复制文件后只按条带改写logo所在的行，内存只与条带大小有关；
+    2. 安装了 pyvips 时交给libvips流式处理，其他格式和参数也能保持内存有界；
+    3. 以上都不可用时解除Pillow的像素数限制，整幅解码一次后原位粘贴。
+
+    返回实际使用的方式："raw"、"vips" 或 "pillow"。参数见 watermark_image。
+    """
+    from PIL import Image
+
+    output_format = resolve_output_format(output_format)
+    if not output_format:
+        output_format = Image.registered_extensions().get(os.path.splitext(output_path)[1].lower())
+
+    with unlimited_pixels(), Image.open(file_path) as img:
+        source_format, mode, size = img.format, img.mode, img.size
+        tiles = _raw_tiles(img)
+
+    if (tiles and not max_size and options.get('keep_metadata', True)
+            and (output_format or source_format) == source_format):
+        logo, mask = logo_cache.get(logo_size_for(size, logo_cache, scale))
+        coords = calculate_position(size, logo.size, position, margin)
+        shutil.copyfile(file_path, output_path)
+        _patch_raw_tiles(output_path, tiles, mode, logo, mask, coords)
+        return "raw"
+
+    pyvips = _import_pyvips()
+    if pyvips is not None and mode in ('RGB', 'RGBA'):
+        target_size = fit_size(size, max_size) if max_size else None
+        logo, _ = logo_cache.get(logo_size_for(target_size or size, logo_cache, scale))
+        coords = calculate_position(target_size or size, logo.size, position, margin)
+        _watermark_vips(pyvips, file_path, output_path, logo, coords, output_format or source_format,
+                        target_size, **options)
+        return "vips"
+
+    with unlimited_pixels():
+        watermark_image(file_path, output_path, logo_cache, position, margin, scale, max_size, output_format,
+                        **options)
+    return "pillow"
+
+
+def watermark_file(file_path, logo_cache, position="bottom_right", margin=20, output_suffix='_watermarked',
+                   output_dir=None, output_format=None, large_image=None, **options):
+    """给单张图片添加水印并保存，返回输出路径，出错时抛出异常
+
+    output_dir -- 输出目录，不存在时自动创建，默认与原图相同
+    large_image -- True 强制使用大图模式，False 关闭；默认超过 LARGE_IMAGE_PIXELS 时自动启用，
+                   见 watermark_large_image
+    其余参数见 watermark_image
+    """
+    output_format = resolve_output_format(output_format)
+    output_path = get_output_path(file_path, output_suffix, output_format, output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if large_image is None:
+        large_image = is_large_image(file_path)
+    if large_image:
+        watermark_large_image(file_path, output_path, logo_cache, position, margin, output_format=output_format,
+                              **options)
+    else:
+        watermark_image(file_path, output_path, logo_cache, position, margin, output_format=output_format,
+                        **options)
+    return output_path
+
+
+def watermark_bytes(data, logo_cache, position="bottom_right", margin=20, **options):
+    """在内存中处理一张图片的字节内容，返回加水印后的字节，不产生临时文件"""
+    output = io.BytesIO()
+    watermark_image(io.BytesIO(data), output, logo_cache, position, margin, **options)
+    return output.getvalue()
+
+
+def add_watermark(input_folder, logo_path, position="bottom_right", margin=20, output_suffix='_watermarked',
+                  opacity=1.0, **options):
+    """添加水印到图片
+    
+    参数:
+    input_folder -- 包含图片的文件夹
+    logo_path -- 水印图片路径
+    position -- 水印位置: "top_left", "top_right", "bottom_left", "bottom_right"
+    margin -- 水印到边缘的距离（像素）
+    output_suffix -- 输出文件名后缀
+    opacity -- logo不透明度，0到1
+    options -- 比例、缩放和编码选项，见 watermark_image
+    """
+    try:
+        logo_cache = LogoCache(load_logo(logo_path, opacity))
+    except Exception as e:
+        print(f"无法加载商标图片：{e}")
+        return
+
+    for file_path in list_images(input_folder, output_suffix):
+        filename = os.path.basename(file_path)
+        try:
+            watermark_file(file_path, logo_cache, position, margin, output_suffix, **options)
+            print(f"已处理: {filename}")
+        except Exception as e:
+            print(f"处理 {filename} 时出错：{e}")
+
+    print(format_cache_stats(logo_cache.stats()))
+
+
+# 工作进程内的logo缓存，由初始化函数加载一次，避免每个任务都序列化传输logo
+_worker_cache = None
+
+
+def _init_worker(logo_path, opacity=1.0):
+    global _worker_cache
+    _worker_cache = LogoCache(load_logo(logo_path, opacity))
+
+
+def _watermark_in_worker(file_path, kwargs):
+    before = _worker_cache.stats()
+    output_path, error = None, None
+    try:
+        output_path = watermark_file(file_path, _worker_cache, **kwargs)
+    except Exception as e:
+        error = str(e)
+    after = _worker_cache.stats()
+    cache_delta = {key: after[key] - before[key] for key in after}
+    return file_path, output_path, error, cache_delta
+
+
+def _run_tasks(tasks, logo_path, workers=None, progress=None, opacity=1.0):
+    """执行 [(文件路径, watermark_file参数)]，workers 为 1 时在当前进程中顺序处理
+
+    返回 ({文件路径: 输出路径}, {文件路径: 错误信息}, logo缓存统计)
+    """
+    outputs, errors = {}, {}
+    cache_stats = {"hits": 0, "misses": 0}
+
+    def collect(done, result):
+        file_path, output_path, error, cache_delta = result
+        for key, value in cache_delta.items():
+            cache_stats[key] += value
+        if error:
+            errors[file_path] = error
+        else:
+            outputs[file_path] = output_path
+        if progress:
+            progress(done, len(tasks), file_path, error)
+
+    if not tasks:
+        return outputs, errors, cache_stats
+
+    if workers == 1:
+        _init_worker(logo_path, opacity)
+        for done, (file_path, kwargs) in enumerate(tasks, start=1):
+            collect(done, _watermark_in_worker(file_path, kwargs))
+        return outputs, errors, cache_stats
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(logo_path, opacity)) as executor:
+        futures = [executor.submit(_watermark_in_worker, file_path, kwargs) for file_path, kwargs in tasks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            collect(done, future.result())
+
+    return outputs, errors, cache_stats
+
+
+def add_watermark_parallel(input_folder, logo_path, position="bottom_right", margin=20,
+                           output_suffix='_watermarked', workers=None, progress=None, opacity=1.0, **options):
+    """使用进程池并行添加水印，参数同 add_watermark
+
+    workers -- 进程数，默认为CPU核心数
+    progress -- 每完成一张图片调用一次 progress(已完成数, 总数, 文件路径, 错误信息或None)
+
+    返回 (输出文件列表, {文件路径: 错误信息}, logo缓存统计)，单个文件出错不会中断其他文件。
+    """
+    # 先在主进程加载一次，logo有问题时直接报错，而不是让每个工作进程初始化失败
+    load_logo(logo_path)
+
+    kwargs = dict(options, position=position, margin=margin, output_suffix=output_suffix)
+    tasks = [(file_path, kwargs) for file_path in list_images(input_folder, output_suffix)]
+    outputs, errors, cache_stats = _run_tasks(tasks, logo_path, workers, progress, opacity)
+    return list(outputs.values()), errors, cache_stats
+
+
+def walk_images(input_root, output_root=None, output_suffix=None):
+    """递归列出图片，跳过隐藏目录、输出目录以及带输出后缀的文件"""
+    output_root = os.path.realpath(output_root) if output_root else None
+
+    for root, dirs, files in os.walk(input_root):
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith('.') and os.path.realpath(os.path.join(root, d)) != output_root
+        )
+        for filename in sorted(files):
+            stem, ext = os.path.splitext(filename)
+            if filename.startswith('.') or ext.lower() not in SUPPORTED_EXT:
+                continue
+            if output_suffix and stem.endswith(output_suffix):
+                continue
+            yield os.path.join(root, filename)
+
+
+def file_md5(file_path):
+    hash_md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def settings_hash(logo_path, **settings):
+    """logo内容和全部水印参数的摘要，任一变化都会让已处理的图片重新处理"""
+    payload = json.dumps(dict(settings, logo=file_md5(logo_path)), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(manifest_path, entries):
+    """先写临时文件再替换，中途中断不会留下损坏的清单"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": MANIFEST_VERSION, "files": entries}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def run_batch(input_root, output_root, logo_path, position="bottom_right", margin=20, output_suffix='_wm',
+              workers=None, progress=None, manifest_path=None, force=False, opacity=1.0, **options):
+    """递归处理 input_root 下的图片，按原目录结构写入 output_root，只处理新增或修改过的图片
+
+    清单默认保存在 output_root/.watermark_manifest.json，记录每个源文件的大小、修改时间、
+    参数摘要和输出路径；三者都未变且输出文件仍存在时跳过。force 为 True 时全部重新处理。
+
+    返回 {"processed": 输出文件列表, "skipped": 跳过数量, "errors": {文件: 错误}, "cache": logo缓存统计}
+    """
+    load_logo(logo_path)
+    manifest_path = manifest_path or os.path.join(output_root, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+
+    settings = dict(options, position=position, margin=margin, output_suffix=output_suffix)
+    digest = settings_hash(logo_path, opacity=opacity, **settings)
+    entries = {} if force else load_manifest(manifest_path)
+
+    tasks, current, skipped = [], {}, 0
+    for file_path in walk_images(input_root, output_root, output_suffix):
+        rel_path = os.path.relpath(file_path, input_root)
+        stat = os.stat(file_path)
+        entry = entries.get(rel_path)
+        current[rel_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "settings": digest}
+
+        if (entry and all(entry.get(key) == value for key, value in current[rel_path].items())
+                and os.path.exists(os.path.join(output_root, entry.get("output", "")))):
+            current[rel_path]["output"] = entry["output"]
+            skipped += 1
+            continue
+
+        output_dir = os.path.join(output_root, os.path.dirname(rel_path))
+        tasks.append((file_path, dict(settings, output_dir=output_dir)))
+
+    outputs, errors, cache_stats = _run_tasks(tasks, logo_path, workers, progress, opacity)
+
+    # 只保留本次仍存在且已成功输出的源文件，失败的下次会重试
+    new_entries = {}
+    for rel_path, entry in current.items():
+        file_path = os.path.join(input_root, rel_path)
+        if file_path in outputs:
+            entry["output"] = os.path.relpath(outputs[file_path], output_root)
+        if "output" in entry:
+            new_entries[rel_path] = entry
+    save_manifest(manifest_path, new_entries)
+
+    return {
+        "processed": list(outputs.values()),
+        "skipped": skipped,
+        "errors": errors,
+        "cache": cache_stats,
+    }
+
+
+def print_progress(done, total, file_path, error, file=None):
+    if error:
+        print(f"[{done}/{total}] 处理 {os.path.basename(file_path)} 时出错：{error}", file=file)
+    else:
+        print(f"[{done}/{total}] 已处理: {os.path.basename(file_path)}", file=file)
+
+
+def collect_images(patterns, output_suffix=None):
+    """展开文件路径和通配符为图片列表，目录单独返回，交给 run_batch 递归处理"""
+    files, folders = [], []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            folders.append(pattern)
+            continue
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for path in sorted(matches):
+            stem, ext = os.path.splitext(os.path.basename(path))
+            if ext.lower() not in SUPPORTED_EXT or (output_suffix and stem.endswith(output_suffix)):
+                continue
+            files.append(path)
+    return files, folders
+
+
+def folder_output_roots(folders, output_dir=None):
+    """各输入目录的输出根目录；目录名重复、无法区分时返回 None
+
+    没有 -o 时写回各自目录；只有一个目录时直接使用 output_dir；
+    多个目录时分别写入 output_dir 下以目录名命名的子目录，各自保存清单，互不覆盖。
+    """
+    if not output_dir:
+        return list(folders)
+    if len(folders) == 1:
+        return [output_dir]
+    names = [os.path.basename(os.path.normpath(os.path.abspath(folder))) for folder in folders]
+    if len(set(names)) != len(names):
+        return None
+    return [os.path.join(output_dir, name) for name in names]
+
+
+def find_output_conflicts(files, output_suffix, output_format=None, output_dir=None):
+    """返回 {输出路径: [源文件, ...]}，只包含被多个源文件共用的输出路径（如 -o 配合 ** 通配符时的同名文件）"""
+    sources = {}
+    for path in files:
+        sources.setdefault(get_output_path(path, output_suffix, output_format, output_dir), []).append(path)
+    return {output_path: paths for output_path, paths in sources.items() if len(paths) > 1}
+
+
+def parse_max_size(value):
+    """"1600" 表示最长边，"1600x1200" 表示外框"""
+    if 'x' in value.lower():
+        width, height = value.lower().split('x')
+        return int(width), int(height)
+    return int(value)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="给图片批量添加水印。不带参数运行时打开图形界面。",
+        epilog="从标准输入读取文件列表: find imgs -name '*.jpg' | %(prog)s --logo logo.png -\n"
+               "管道处理单张图片: cat a.jpg | %(prog)s --logo logo.png --stream > a_wm.jpg",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("inputs", nargs="*",
+                        help="图片、目录或通配符；目录会递归增量处理；- 表示从标准输入逐行读取路径")
+    parser.add_argument("--logo", required=True, help="水印图片路径")
+    parser.add_argument("-p", "--position", choices=POSITIONS, default="bottom_right", help="水印位置")
+    parser.add_argument("-m", "--margin", type=int, default=30, help="水印到边缘的距离（像素）")
+    parser.add_argument("-s", "--scale", type=float, default=DEFAULT_SCALE, help="logo宽度占原图宽度的比例")
+    parser.add_argument("--opacity", type=float, default=1.0, help="logo不透明度，0到1")
+    parser.add_argument("-o", "--output-dir", help="输出目录；目录输入时按原结构镜像，有多个目录时各自写入以目录名命名的子目录；"
+                             "默认写在原图旁边")
+    parser.add_argument("--suffix", default="_wm", help="输出文件名后缀")
+    parser.add_argument("--max-size", type=parse_max_size, help="输出最大尺寸，如 1600 或 1600x1200")
+    parser.add_argument("-f", "--format", dest="output_format", help="输出格式，如 jpeg、png、webp、avif")
+    parser.add_argument("-q", "--quality", type=int, default=95, help="JPEG/WebP/AVIF 编码质量")
+    parser.add_argument("--optimize", action="store_true", help="优化编码（文件更小，耗时更长）")
+    parser.add_argument("--progressive", action="store_true", help="输出渐进式JPEG")
+    parser.add_argument("--strip-metadata", action="store_true", help="不保留EXIF和ICC配置")
+    parser.add_argument("--large-image", choices=("auto", "always", "never"), default="auto",
+                        help="大图模式：按条带处理超大图片，只在logo区域按原分辨率合成；"
+                             f"auto 表示超过 {LARGE_IMAGE_PIXELS // 1000000} 百万像素时启用")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并行进程数，默认为CPU核心数")
+    parser.add_argument("--force", action="store_true", help="忽略清单，重新处理目录中的全部图片")
+    parser.add_argument("--stream", action="store_true", help="从标准输入读取图片内容，向标准输出写出结果")
+    return parser.parse_args(argv)
+
+
+def run_cli(argv):
+    args = parse_args(argv)
+    if not 0 <= args.opacity <= 1:
+        print("错误：--opacity 必须在0到1之间", file=sys.stderr)
+        return 2
+
+    options = {
+        "scale": args.scale,
+        "max_size": args.max_size,
+        "output_format": args.output_format,
+        "quality": args.quality,
+        "optimize": args.optimize,
+        "progressive": args.progressive,
+        "keep_metadata": not args.strip_metadata,
+    }
+
+    if args.stream:
+        # 大图模式按条带读写文件，标准输入输出无法使用
+        if args.large_image != "auto":
+            print("错误：--stream 不支持 --large-image", file=sys.stderr)
+            return 2
+        logo_cache = LogoCache(load_logo(args.logo, args.opacity))
+        data = sys.stdin.buffer.read()
+        sys.stdout.buffer.write(watermark_bytes(data, logo_cache, args.position, args.margin, **options))
+        sys.stdout.buffer.flush()
+        return 0
+
+    if args.large_image != "auto":
+        options["large_image"] = args.large_image == "always"
+
+    patterns = list(args.inputs)
+    if '-' in patterns:
+        patterns.remove('-')
+        patterns.extend(line.strip() for line in sys.stdin if line.strip())
+    files, folders = collect_images(patterns, args.suffix)
+    if not files and not folders:
+        print("没有找到需要处理的图片", file=sys.stderr)
+        return 1
+
+    output_roots = folder_output_roots(folders, args.output_dir)
+    try:
+        output_format = resolve_output_format(args.output_format)
+    except ValueError as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 2
+    files = list(dict.fromkeys(os.path.abspath(path) for path in files))
+    conflicts = find_output_conflicts(files, args.suffix, output_format, args.output_dir)
+    if output_roots is None or conflicts:
+        if output_roots is None:
+            print("错误：多个输入目录同名，使用 -o 时无法区分各自的输出子目录", file=sys.stderr)
+        for output_path, paths in conflicts.items():
+            print(f"错误：多个文件会输出到同一路径 {output_path}: {', '.join(paths)}", file=sys.stderr)
+        return 2
+
+    progress = functools.partial(print_progress, file=sys.stderr)
+    errors, processed, skipped = {}, 0, 0
+    cache_stats = {"hits": 0, "misses": 0}
+
+    for folder, output_root in zip(folders, output_roots):
+        result = run_batch(folder, output_root, args.logo, args.position, args.margin, args.suffix,
+                           workers=args.jobs, progress=progress, force=args.force, opacity=args.opacity, **options)
+        processed += len(result["processed"])
+        skipped += result["skipped"]
+        errors.update(result["errors"])
+        for key, value in result["cache"].items():
+            cache_stats[key] += value
+
+    if files:
+        load_logo(args.logo)
+        kwargs = dict(options, position=args.position, margin=args.margin, output_suffix=args.suffix,
+                      output_dir=args.output_dir)
+        outputs, file_errors, file_cache_stats = _run_tasks([(path, kwargs) for path in files], args.logo,
+                                                            args.jobs, progress, args.opacity)
+        processed += len(outputs)
+        errors.update(file_errors)
+        for key, value in file_cache_stats.items():
+            cache_stats[key] += value
+
+    print(f"处理完成！成功 {processed} 张，跳过 {skipped} 张，失败 {len(errors)} 张", file=sys.stderr)
+    print(format_cache_stats(cache_stats), file=sys.stderr)
+    for file_path, error in errors.items():
+        print(f"失败: {file_path} - {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def run_gui():
+    try:
+        from tkinter import Tk, filedialog
+    except ImportError:
+        print("错误：需要Tkinter支持，请按以下方式安装：")
+        print("Linux用户：sudo apt-get install python3-tk")
+        print("也可以使用命令行参数以无界面模式运行，详见 --help")
+        sys.exit(1)
+
+    # 选择图片文件夹
+    root = Tk()
+    root.withdraw()  # 隐藏主窗口
+    
+    input_folder = filedialog.askdirectory(title="选择图片文件夹")
+    if not input_folder:
+        print("未选择文件夹，程序退出")
+        sys.exit()
+    
+    # 选择水印图片
+    logo_path = filedialog.askopenfilename(
+        title="选择商标图片",
+        filetypes=[
+            ("PNG图片", "*.png"),
+            ("JPEG图片", "*.jpg *.jpeg"),
+            ("GIF图片", "*.gif"),
+            ("BMP图片", "*.bmp"),
+            ("所有文件", "*.*")
+        ]
+    )
+    if not logo_path:
+        print("未选择商标图片，程序退出")
+        sys.exit()
+    
+    root.destroy()  # 关闭主窗口
+    
+    # 选择水印位置
+    position = select_watermark_position()
+    if not position:
+        print("未选择水印位置，程序退出")
+        sys.exit()
+    
+    try:
+        # 输出写回原文件夹，由清单和输出后缀保证重复运行时不会再处理已输出的图片
+        result = run_batch(
+            input_folder,
+            input_folder,
+            logo_path=logo_path,
+            position=position,
+            margin=30,
+            output_suffix="_wm",
+            progress=print_progress
+        )
+        print(f"处理完成！成功 {len(result['processed'])} 张，跳过 {result['skipped']} 张，"
+              f"失败 {len(result['errors'])} 张")
+        print(format_cache_stats(result["cache"]))
+        for file_path, error in result["errors"].items():
+            print(f"失败: {file_path} - {error}")
+        
+        # 打开输出文件夹
+        open_folder(input_folder)
+    except Exception as e:
+        print(f"发生未捕获错误：{str(e)}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(run_cli(argv))
+    run_gui()
+
+
+if __name__ == "__main__":
+    main()